@@ -0,0 +1,124 @@
+"""Ресурсы API: какие поля у каждого типа и как их читать из модели.
+
+Ответ строится только из запрошенных полей (?fields=..., для связанных
+типов ?fields[users]=...), и из базы читаются только их колонки. Связи
+(author, group, post, user) выводятся как id; ?include=author,group
+добавляет связанные объекты в included — по одному запросу на тип,
+сколько бы объектов ни было на странице.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.fields.files import FieldFile
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class Resource:
+    def __init__(self, model, fields, relations=None):
+        self.model = model
+        self.fields = fields
+        # Поле ответа -> тип связанного ресурса.
+        self.relations = relations or {}
+
+    def only(self, queryset, fields, include=()):
+        return queryset.only('pk', *fields, *include)
+
+    def serialize(self, obj, fields):
+        data = {}
+        for field in fields:
+            if field in self.relations:
+                value = getattr(obj, f'{field}_id')
+            else:
+                value = getattr(obj, field)
+            data[field] = encode(value)
+        return data
+
+
+def encode(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, FieldFile):
+        return value.url if value else None
+    return value
+
+
+RESOURCES = {
+    'posts': Resource(
+        Post,
+        fields=('id', 'text', 'pub_date', 'updated', 'image',
+                'comments_count', 'author', 'group'),
+        relations={'author': 'users', 'group': 'groups'},
+    ),
+    'groups': Resource(
+        Group,
+        fields=('id', 'title', 'slug', 'description', 'posts_count'),
+    ),
+    'comments': Resource(
+        Comment,
+        fields=('id', 'text', 'pub_date', 'author', 'post'),
+        relations={'author': 'users', 'post': 'posts'},
+    ),
+    'follows': Resource(
+        Follow,
+        fields=('id', 'user', 'author'),
+        relations={'user': 'users', 'author': 'users'},
+    ),
+    'users': Resource(
+        User,
+        fields=('id', 'username', 'first_name', 'last_name'),
+    ),
+}
+
+
+class FieldError(ValueError):
+    """Неизвестное поле или связь в параметрах запроса."""
+
+
+def requested_fields(request, resource_type, primary=False):
+    """Поля ресурса из ?fields[тип]= (для основного типа и ?fields=)."""
+    resource = RESOURCES[resource_type]
+    value = request.GET.get(f'fields[{resource_type}]')
+    if value is None and primary:
+        value = request.GET.get('fields')
+    if not value:
+        return resource.fields
+    fields = tuple(dict.fromkeys(value.split(',')))
+    unknown = set(fields) - set(resource.fields)
+    if unknown:
+        raise FieldError(
+            f'Неизвестные поля {resource_type}: {", ".join(sorted(unknown))}.')
+    return fields
+
+
+def requested_include(request, resource_type):
+    value = request.GET.get('include')
+    if not value:
+        return ()
+    include = tuple(dict.fromkeys(value.split(',')))
+    unknown = set(include) - set(RESOURCES[resource_type].relations)
+    if unknown:
+        names = ', '.join(sorted(unknown))
+        raise FieldError(f'Неизвестные связи {resource_type}: {names}.')
+    return include
+
+
+def included(request, resource_type, objects, include):
+    """Связанные объекты по типам: один запрос in_bulk на тип."""
+    resource = RESOURCES[resource_type]
+    ids = {}
+    for relation in include:
+        related_type = resource.relations[relation]
+        ids.setdefault(related_type, set()).update(
+            getattr(obj, f'{relation}_id') for obj in objects)
+    result = {}
+    for related_type, pks in ids.items():
+        pks.discard(None)
+        related = RESOURCES[related_type]
+        fields = requested_fields(request, related_type)
+        queryset = related.only(related.model.objects.all(), fields)
+        result[related_type] = [
+            related.serialize(obj, fields)
+            for obj in queryset.in_bulk(sorted(pks)).values()
+        ]
+    return result
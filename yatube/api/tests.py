@@ -0,0 +1,167 @@
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='Author', first_name='Лев', last_name='Толстой')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug',
+            description='Тестовое описание')
+        cls.posts = [
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'Пост {i}')
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def get(self, url, params=None, client=None, status=200):
+        response = (client or self.guest_client).get(url, params)
+        self.assertEqual(response.status_code, status)
+        return response.json()
+
+    def send(self, client, method, url, data=None, status=200):
+        response = getattr(client, method)(
+            url, json.dumps(data or {}), content_type='application/json')
+        self.assertEqual(response.status_code, status, response.content)
+        return response.json() if response.content else None
+
+    def test_cursor_pagination(self):
+        """Список постов листается по links.next от новых к старым."""
+        url = reverse('api:posts')
+        body = self.get(url, {'limit': 2})
+        seen = [post['id'] for post in body['data']]
+        while body['links']['next']:
+            body = self.get(body['links']['next'])
+            seen += [post['id'] for post in body['data']]
+        self.assertEqual(seen, [post.pk for post in reversed(self.posts)])
+
+    def test_sparse_fields(self):
+        """?fields= оставляет в ответе только запрошенные поля."""
+        body = self.get(reverse('api:posts'), {'fields': 'id,text'})
+        self.assertEqual(set(body['data'][0]), {'id', 'text'})
+        body = self.get(reverse('api:posts'), {'fields': 'id,secret'},
+                        status=400)
+        self.assertIn('secret', body['errors'])
+
+    def test_include(self):
+        """include добавляет авторов и группы одним запросом на тип."""
+        url = reverse('api:posts')
+        params = {'include': 'author,group', 'fields[users]': 'username'}
+        with self.assertNumQueries(3):
+            body = self.get(url, dict(params, limit=1))
+        with self.assertNumQueries(3):
+            body = self.get(url, dict(params, limit=5))
+        self.assertEqual(body['included'], {
+            'users': [{'username': 'Author'}],
+            'groups': [{
+                'id': self.group.pk, 'title': 'Тестовая группа',
+                'slug': 'test_slug', 'description': 'Тестовое описание',
+                'posts_count': 5,
+            }],
+        })
+
+    def test_filters(self):
+        """Ленты группы, автора и подписок."""
+        other = Post.objects.create(author=self.reader, text='Без группы')
+        ids = [post['id'] for post in self.get(
+            reverse('api:posts'), {'group': 'test_slug'})['data']]
+        self.assertNotIn(other.pk, ids)
+        ids = [post['id'] for post in self.get(
+            reverse('api:posts'), {'author': 'Reader'})['data']]
+        self.assertEqual(ids, [other.pk])
+        Follow.objects.create(user=self.reader, author=self.author)
+        body = self.get(reverse('api:posts'), {'feed': 'follow'},
+                        client=self.reader_client)
+        self.assertEqual(len(body['data']), 5)
+
+    def test_create_post(self):
+        """Пост создаётся через форму PostForm от имени пользователя."""
+        url = reverse('api:posts')
+        self.send(self.guest_client, 'post', url, {'text': 'Пост'}, 401)
+        body = self.send(self.author_client, 'post', url, {'text': ''}, 400)
+        self.assertIn('text', body['errors'])
+        body = self.send(self.author_client, 'post', url, {
+            'text': 'Новый пост', 'group': self.group.pk}, 201)
+        post = Post.objects.get(pk=body['data']['id'])
+        self.assertEqual((post.author, post.group),
+                         (self.author, self.group))
+
+    def test_body_not_object(self):
+        """JSON-массив или скаляр в теле — ошибка 400, а не 500."""
+        url = reverse('api:posts')
+        for data in (['Пост'], 'Пост', 5):
+            with self.subTest(data=data):
+                self.send(self.author_client, 'post', url, data, 400)
+
+    def test_edit_and_delete(self):
+        """Менять и удалять пост может только автор."""
+        url = reverse('api:post', args=[self.posts[0].pk])
+        self.send(self.reader_client, 'patch', url, {'text': 'Чужой'}, 403)
+        body = self.send(self.author_client, 'patch', url,
+                         {'text': 'Исправлено'})
+        self.assertEqual(body['data']['text'], 'Исправлено')
+        self.assertEqual(body['data']['group'], self.group.pk)
+        self.send(self.reader_client, 'delete', url, status=403)
+        self.send(self.author_client, 'delete', url, status=204)
+        self.get(url, status=404)
+
+    def test_comments(self):
+        """Комментарии читаются с авторами и добавляются."""
+        post = self.posts[0]
+        url = reverse('api:comments', args=[post.pk])
+        self.send(self.reader_client, 'post', url,
+                  {'text': 'Комментарий'}, 201)
+        body = self.get(url, {'include': 'author',
+                              'fields[users]': 'username'})
+        self.assertEqual(body['data'][0]['text'], 'Комментарий')
+        self.assertEqual(body['included']['users'], [{'username': 'Reader'}])
+        self.assertEqual(Comment.objects.get().author, self.reader)
+
+    def test_follows(self):
+        """Подписка создаётся, читается и удаляется."""
+        url = reverse('api:follows')
+        self.send(self.reader_client, 'post', url, {'author': 'Reader'}, 400)
+        self.send(self.reader_client, 'post', url, {'author': 'Author'}, 201)
+        self.send(self.reader_client, 'post', url, {'author': 'Author'}, 200)
+        body = self.get(url, client=self.reader_client)
+        self.assertEqual(body['data'][0]['author'], self.author.pk)
+        self.send(self.reader_client, 'delete',
+                  reverse('api:follow', args=['Author']), status=204)
+        self.assertFalse(Follow.objects.exists())
+        self.get(url, status=401)
+
+    def test_groups(self):
+        body = self.get(reverse('api:groups'), {'fields': 'slug'})
+        self.assertEqual(body['data'], [{'slug': 'test_slug'}])
+        body = self.get(reverse('api:group', args=['test_slug']))
+        self.assertEqual(body['data']['posts_count'], 5)
+
+    def test_gzip(self):
+        """Ответ сжимается, если клиент принимает gzip."""
+        response = self.guest_client.get(
+            reverse('api:posts'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(body['data']), 5)
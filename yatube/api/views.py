@@ -0,0 +1,257 @@
+"""JSON API над постами, группами, комментариями и подписками.
+
+Списки листаются курсором (?cursor= из links.next), размер страницы —
+?limit= не больше API_MAX_PAGE_SIZE. Запись проверяется теми же
+формами, что и в posts.views, и требует входа (сессия и CSRF-токен в
+заголовке X-CSRFToken). Ответы сжимаются brotli или gzip.
+"""
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import Http404, HttpResponse, JsonResponse, QueryDict
+from django.shortcuts import get_object_or_404
+
+from core.compression import compress
+from core.db import use_primary, use_replica
+from posts import timeline
+from posts.forms import CommentForm, PostForm
+from posts.models import Follow, Group, Post, User
+from posts.utils import KEYSET_ORDERING, CursorPaginator
+from posts.views import comment_page
+
+from .resources import (RESOURCES, FieldError, included, requested_fields,
+                        requested_include)
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def error(status, detail):
+    return JsonResponse({'errors': detail}, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def api_view(*methods):
+    """Методы view, JSON-ошибки, вход для записи, база и сжатие."""
+    def decorator(view):
+        @compress
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            if request.method not in methods:
+                return error(405, f'Метод {request.method} не поддерживается.')
+            reading = request.method in SAFE_METHODS
+            if not reading and not request.user.is_authenticated:
+                return error(401, 'Нужно войти.')
+            try:
+                with use_replica() if reading else use_primary():
+                    return view(request, *args, **kwargs)
+            except Http404:
+                return error(404, 'Не найдено.')
+            except PermissionDenied:
+                return error(403, 'Недостаточно прав.')
+            except FieldError as exc:
+                return error(400, str(exc))
+        return inner
+    return decorator
+
+
+def request_data(request):
+    """Данные записи: JSON-тело или обычная форма."""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            raise FieldError('Тело запроса — не JSON.')
+        if not isinstance(data, dict):
+            raise FieldError('Тело запроса должно быть JSON-объектом.')
+        query = QueryDict(mutable=True)
+        for name, value in data.items():
+            query[name] = '' if value is None else value
+        return query
+    if request.method == 'POST':
+        return request.POST
+    return QueryDict(request.body, encoding=request.encoding)
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        size = settings.API_PAGE_SIZE
+    return max(1, min(size, settings.API_MAX_PAGE_SIZE))
+
+
+def next_link(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+
+def document(request, resource_type, data, fields, include, next_cursor=None,
+             status=200):
+    """Ответ с объектом или списком, связанными объектами и ссылками."""
+    resource = RESOURCES[resource_type]
+    objects = data if isinstance(data, list) else [data]
+    serialized = [resource.serialize(obj, fields) for obj in objects]
+    body = {'data': serialized if isinstance(data, list) else serialized[0]}
+    if include:
+        body['included'] = included(request, resource_type, objects, include)
+    if isinstance(data, list):
+        body['links'] = {'next': next_link(request, next_cursor)}
+    return JsonResponse(body, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def options(request, resource_type):
+    return (requested_fields(request, resource_type, primary=True),
+            requested_include(request, resource_type))
+
+
+def post_list_queryset(request):
+    """Лента по ?feed=follow, ?group=slug или ?author=username."""
+    if request.GET.get('feed') == 'follow':
+        if not request.user.is_authenticated:
+            raise PermissionDenied
+        return timeline.feed(request.user)
+    if 'group' in request.GET:
+        return get_object_or_404(Group, slug=request.GET['group']).posts.all()
+    if 'author' in request.GET:
+        return get_object_or_404(
+            User, username=request.GET['author']).posts.all()
+    return Post.objects.all()
+
+
+def form_response(request, form, resource_type, status):
+    if not form.is_valid():
+        return error(400, form.errors)
+    obj = form.save()
+    fields, include = options(request, resource_type)
+    return document(request, resource_type, obj, fields, include,
+                    status=status)
+
+
+@api_view('GET', 'HEAD', 'POST')
+def posts(request):
+    if request.method == 'POST':
+        return create_post(request)
+    fields, include = options(request, 'posts')
+    post_list = post_list_queryset(request)
+    if not post_list.query.order_by:
+        post_list = post_list.order_by(*KEYSET_ORDERING)
+    post_list = RESOURCES['posts'].only(
+        post_list, (*fields, 'pub_date'), include)
+    page = CursorPaginator(post_list, page_size(request)).cursor_page(
+        request.GET.get('cursor'))
+    return document(request, 'posts', list(page), fields, include,
+                    page.next_cursor)
+
+
+@transaction.atomic
+def create_post(request):
+    form = PostForm(request_data(request), files=request.FILES or None)
+    form.instance.author = request.user
+    return form_response(request, form, 'posts', 201)
+
+
+@api_view('GET', 'HEAD', 'PATCH', 'DELETE')
+def post(request, post_id):
+    if request.method in SAFE_METHODS:
+        fields, include = options(request, 'posts')
+        queryset = RESOURCES['posts'].only(Post.objects.all(), fields, include)
+        return document(request, 'posts', get_object_or_404(
+            queryset, pk=post_id), fields, include)
+    with transaction.atomic():
+        instance = get_object_or_404(Post, pk=post_id)
+        if instance.author_id != request.user.pk:
+            raise PermissionDenied
+        if request.method == 'DELETE':
+            instance.delete()
+            return HttpResponse(status=204)
+        data = request_data(request).copy()
+        # PATCH меняет только переданные поля.
+        for name in ('text', 'group'):
+            if name not in data:
+                data[name] = getattr(instance, f'{name}_id' if name == 'group'
+                                     else name) or ''
+        form = PostForm(data, instance=instance)
+        return form_response(request, form, 'posts', 200)
+
+
+@api_view('GET', 'HEAD', 'POST')
+def comments(request, post_id):
+    if request.method == 'POST':
+        with transaction.atomic():
+            form = CommentForm(request_data(request))
+            form.instance.author = request.user
+            form.instance.post = get_object_or_404(Post, pk=post_id)
+            return form_response(request, form, 'comments', 201)
+    fields, include = options(request, 'comments')
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    page = comment_page(request, post_id)
+    return document(request, 'comments', list(page), fields, include,
+                    page.next_cursor)
+
+
+def id_page(request, queryset):
+    """Страница по возрастанию id, курсор — id последней записи."""
+    size = page_size(request)
+    cursor = request.GET.get('cursor', '')
+    if cursor.isdigit():
+        queryset = queryset.filter(pk__gt=int(cursor))
+    rows = list(queryset.order_by('pk')[:size + 1])
+    next_cursor = str(rows[size - 1].pk) if len(rows) > size else None
+    return rows[:size], next_cursor
+
+
+@api_view('GET', 'HEAD')
+def groups(request):
+    fields, include = options(request, 'groups')
+    rows, next_cursor = id_page(
+        request, RESOURCES['groups'].only(Group.objects.all(), fields))
+    return document(request, 'groups', rows, fields, include, next_cursor)
+
+
+@api_view('GET', 'HEAD')
+def group(request, slug):
+    fields, include = options(request, 'groups')
+    queryset = RESOURCES['groups'].only(Group.objects.all(), fields)
+    return document(request, 'groups', get_object_or_404(queryset, slug=slug),
+                    fields, include)
+
+
+@api_view('GET', 'HEAD', 'POST')
+def follows(request):
+    if not request.user.is_authenticated:
+        return error(401, 'Нужно войти.')
+    if request.method == 'POST':
+        return create_follow(request)
+    fields, include = options(request, 'follows')
+    queryset = RESOURCES['follows'].only(
+        Follow.objects.filter(user=request.user), fields, include)
+    rows, next_cursor = id_page(request, queryset)
+    return document(request, 'follows', rows, fields, include, next_cursor)
+
+
+@transaction.atomic
+def create_follow(request):
+    username = request_data(request).get('author', '')
+    author = get_object_or_404(User, username=username)
+    if author == request.user:
+        return error(400, {'author': ['Нельзя подписаться на себя.']})
+    follow, created = Follow.objects.get_or_create(
+        user=request.user, author=author)
+    fields, include = options(request, 'follows')
+    return document(request, 'follows', follow, fields, include,
+                    status=201 if created else 200)
+
+
+@api_view('DELETE')
+def follow(request, username):
+    with transaction.atomic():
+        get_object_or_404(
+            Follow, user=request.user, author__username=username).delete()
+    return HttpResponse(status=204)
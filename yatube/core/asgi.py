@@ -0,0 +1,173 @@
+"""ASGI-приложение поверх обработчика WSGI.
+
+В Django 2.2 нет ни ASGI-обработчика, ни асинхронных view. ASGIHandler
+принимает запрос в цикле событий, а сам Django выполняет в пуле из
+ASGI_THREADS потоков: медленный запрос к базе занимает поток пула, но
+не блокирует приём других соединений.
+"""
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+import django
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+
+from .templates import warm_up_on_startup
+
+# Сколько сообщений ответа может ждать отправки клиенту.
+RESPONSE_QUEUE_SIZE = 4
+
+
+def build_environ(scope, body):
+    """WSGI environ для HTTP-запроса ASGI."""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+class ClientGone(Exception):
+    """Клиент больше не принимает ответ."""
+
+
+def run_wsgi(application, environ, emit):
+    """Выполняет WSGI-приложение и передаёт ответ сообщениями ASGI.
+
+    emit блокирует поток, пока сообщение не заберёт цикл событий: тело
+    потокового ответа не копится в памяти целиком.
+    """
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in headers
+        ]
+
+    try:
+        response = application(environ, start_response)
+        try:
+            emit({
+                'type': 'http.response.start',
+                'status': started['status'],
+                'headers': started['headers'],
+            })
+            for chunk in response:
+                if chunk:
+                    emit({'type': 'http.response.body', 'body': chunk,
+                          'more_body': True})
+            emit({'type': 'http.response.body', 'body': b''})
+        finally:
+            # close() отправляет request_finished: соединения с базой
+            # закрываются в том же потоке, где открывались.
+            if hasattr(response, 'close'):
+                response.close()
+    finally:
+        emit(None, force=True)
+
+
+class ASGIHandler:
+    def __init__(self, wsgi_application=None, threads=None):
+        self.wsgi_application = wsgi_application or WSGIHandler()
+        self.executor = ThreadPoolExecutor(
+            threads or settings.ASGI_THREADS, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(
+                f'Неподдерживаемый тип соединения {scope["type"]}.')
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        await self.respond(build_environ(scope, body), send)
+
+    async def respond(self, environ, send):
+        """Передаёт клиенту ответ, который Django формирует в пуле."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(RESPONSE_QUEUE_SIZE)
+        abandoned = threading.Event()
+
+        def emit(message, force=False):
+            if abandoned.is_set() and not force:
+                raise ClientGone
+            asyncio.run_coroutine_threadsafe(
+                queue.put(message), loop).result()
+
+        task = loop.run_in_executor(
+            self.executor, run_wsgi, self.wsgi_application, environ, emit)
+        try:
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                await send(message)
+        except BaseException:
+            # Поток пула дочитывает ответ до закрытия, иначе он навсегда
+            # повиснет на полной очереди.
+            abandoned.set()
+            while await queue.get() is not None:
+                pass
+            await asyncio.gather(task, return_exceptions=True)
+            raise
+        await task
+
+    async def read_body(self, receive):
+        """Тело запроса; большое уходит на диск. None — клиент ушёл."""
+        body = SpooledTemporaryFile(settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+        return body
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    handler = ASGIHandler()
+    warm_up_on_startup()
+    return handler
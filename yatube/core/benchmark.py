@@ -0,0 +1,396 @@
+"""Нагрузочные замеры страниц: число запросов, задержка и пиковая память.
+
+seed() наполняет базу синтетическими данными, run() проходит по всем
+маршрутам posts и users через тестовый клиент, compare() сравнивает
+результат с сохранённой базовой линией. throughput() считает запросы в
+секунду к лентам при одновременных клиентах через WSGI и ASGI,
+api_comparison() — байты и миллисекунды страниц JSON API против HTML,
+template_render() — отрисовку главной без кеширующего загрузчика и с ним.
+"""
+import asyncio
+import random
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from io import BytesIO
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.paginator import Paginator
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from faker import Faker
+
+from core.asgi import ASGIHandler, build_environ, run_wsgi
+from core.templates import warm_up
+from posts import counters, timeline
+from posts.utils import PAGINATE_BY
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+BATCH_SIZE = 10000
+TEXT_POOL_SIZE = 1000
+BENCH_PREFIX = 'bench_'
+URL_MODULES = ('posts.urls', 'users.urls')
+# Страница HTML -> та же страница JSON API (с тем же числом записей).
+API_PAIRS = {
+    'posts:index': ('api:posts', {}),
+    'posts:group_list': ('api:posts', {'group': 'slug'}),
+    'posts:profile': ('api:posts', {'author': 'username'}),
+    'posts:post_detail': ('api:comments', {}),
+}
+CACHED_LOADERS = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+FEED_ROUTES = ('posts:index', 'posts:group_list', 'posts:profile',
+               'posts:post_detail', 'posts:follow_index')
+
+
+def batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed(users, posts, follows, comments=0, groups=50, random_seed=0):
+    """Создаёт синтетические данные пачками через bulk_create."""
+    rnd = random.Random(random_seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(random_seed)
+    texts = [fake.paragraph() for _ in range(TEXT_POOL_SIZE)]
+    for batch in batched(
+        User(username=f'{BENCH_PREFIX}{i}', password='!')
+        for i in range(users)
+    ):
+        User.objects.bulk_create(batch)
+    Group.objects.bulk_create(
+        Group(title=f'Группа {i}', slug=f'{BENCH_PREFIX}{i}',
+              description=rnd.choice(texts))
+        for i in range(groups)
+    )
+    user_ids = list(User.objects.filter(
+        username__startswith=BENCH_PREFIX).values_list('id', flat=True))
+    group_ids = list(Group.objects.filter(
+        slug__startswith=BENCH_PREFIX).values_list('id', flat=True))
+    group_ids.append(None)
+    for batch in batched(
+        Post(author_id=rnd.choice(user_ids), group_id=rnd.choice(group_ids),
+             text=rnd.choice(texts))
+        for _ in range(posts)
+    ):
+        Post.objects.bulk_create(batch)
+    post_ids = list(Post.objects.values_list('id', flat=True))
+    for batch in batched(
+        Comment(author_id=rnd.choice(user_ids), post_id=rnd.choice(post_ids),
+                text=rnd.choice(texts)[:500])
+        for _ in range(comments)
+    ):
+        Comment.objects.bulk_create(batch)
+    pairs = (rnd.sample(user_ids, 2) for _ in range(follows))
+    for batch in batched(
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id, author_id in pairs
+    ):
+        Follow.objects.bulk_create(batch, ignore_conflicts=True)
+    # bulk_create не шлёт сигналы: достраиваем ленты и счётчики.
+    timeline.rebuild()
+    counters.rebuild()
+
+
+def percentile(values, share):
+    values = sorted(values)
+    index = min(len(values) - 1, round(share * (len(values) - 1)))
+    return values[index]
+
+
+class Context:
+    """Пользователи и объекты, на которых снимаются замеры."""
+
+    def __init__(self):
+        authors = User.objects.order_by('-profile__posts_count')
+        self.author = authors.first()
+        self.reader = authors.exclude(pk=self.author.pk).first()
+        self.post = Post.objects.filter(author=self.author).first()
+        self.group = Group.objects.filter(posts_count__gt=0).order_by(
+            '-posts_count').first() or Group.objects.first()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def kwargs(self, converters):
+        values = {
+            'slug': self.group.slug if self.group else 'none',
+            'username': self.reader.username,
+            'post_id': self.post.pk,
+            'uidb64': 'MTA',
+            'token': 'set-password',
+        }
+        return {name: values[name] for name in converters}
+
+    def prepare(self, name):
+        """Подготовка перед каждым повтором для изменяющих маршрутов."""
+        if name == 'posts:post_delete':
+            fresh = Post.objects.create(author=self.author, text='bench')
+            return reverse(name, kwargs={'post_id': fresh.pk})
+        if name == 'posts:profile_unfollow':
+            Follow.objects.get_or_create(user=self.author, author=self.reader)
+        if name == 'users:logout':
+            self.client.force_login(self.author)
+        return None
+
+    def finish(self, name):
+        if name == 'users:logout':
+            self.client.force_login(self.author)
+
+
+def routes():
+    for module_name in URL_MODULES:
+        module = import_module(module_name)
+        for pattern in module.urlpatterns:
+            if pattern.name:
+                yield (
+                    f'{module.app_name}:{pattern.name}',
+                    list(pattern.pattern.converters),
+                )
+
+
+def measure(ctx, name, url, repeat, cold):
+    timings = []
+    queries = []
+    status = None
+    for _ in range(repeat):
+        target = ctx.prepare(name) or url
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = ctx.client.get(target)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured))
+        status = response.status_code
+    target = ctx.prepare(name) or url
+    if cold:
+        cache.clear()
+    tracemalloc.start()
+    ctx.client.get(target)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ctx.finish(name)
+    return {
+        'url': url,
+        'status': status,
+        'queries': max(queries),
+        'p50_ms': round(percentile(timings, 0.5), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run(repeat=20, cold=False):
+    ctx = Context()
+    results = {}
+    for name, converters in routes():
+        url = reverse(name, kwargs=ctx.kwargs(converters))
+        results[name] = measure(ctx, name, url, repeat, cold)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Список регрессий относительно базовой линии."""
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if current['queries'] > before['queries']:
+            regressions.append(
+                f'{name}: запросов {before["queries"]} -> '
+                f'{current["queries"]}'
+            )
+        for metric in ('p95_ms', 'peak_kb'):
+            if current[metric] > before[metric] * (1 + tolerance):
+                regressions.append(
+                    f'{name}: {metric} {before[metric]} -> {current[metric]}'
+                )
+    return regressions
+
+
+def http_scope(url, session_key):
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': url,
+        'query_string': b'',
+        'headers': [
+            (b'host', b'testserver'),
+            (b'cookie', f'{settings.SESSION_COOKIE_NAME}={session_key}'
+                        .encode()),
+        ],
+        'server': ('testserver', 80),
+    }
+
+
+def wsgi_rate(application, scope, concurrency, total):
+    def request(_):
+        messages = []
+
+        def emit(message, force=False):
+            messages.append(message)
+
+        run_wsgi(application, build_environ(scope, BytesIO()), emit)
+        return messages[0]['status']
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        statuses = set(pool.map(request, range(total)))
+    return total / (time.perf_counter() - start), statuses
+
+
+def asgi_rate(application, scope, concurrency, total):
+    handler = ASGIHandler(application, threads=concurrency)
+    statuses = set()
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.add(message['status'])
+
+    async def drive():
+        await asyncio.gather(*(handler(scope, receive, send)
+                               for _ in range(total)))
+
+    start = time.perf_counter()
+    asyncio.run(drive())
+    rate = total / (time.perf_counter() - start)
+    handler.executor.shutdown()
+    return rate, statuses
+
+
+def throughput(concurrency=8, total=200):
+    """Запросы в секунду к лентам от concurrency клиентов.
+
+    sync_rps — WSGI с запросами внутри view по очереди, wsgi_rps — WSGI с
+    независимыми запросами view в параллельных потоках, asgi_rps — то же
+    через ASGIHandler.
+    """
+    ctx = Context()
+    session_key = ctx.client.session.session_key
+    application = WSGIHandler()
+    results = {}
+    for name, converters in routes():
+        if name not in FEED_ROUTES:
+            continue
+        scope = http_scope(
+            reverse(name, kwargs=ctx.kwargs(converters)), session_key)
+        with override_settings(VIEW_QUERY_WORKERS=0):
+            sync_rps, statuses = wsgi_rate(
+                application, scope, concurrency, total)
+        wsgi_rps, more = wsgi_rate(application, scope, concurrency, total)
+        asgi_rps, rest = asgi_rate(application, scope, concurrency, total)
+        results[name] = {
+            'statuses': sorted(statuses | more | rest),
+            'sync_rps': round(sync_rps, 1),
+            'wsgi_rps': round(wsgi_rps, 1),
+            'asgi_rps': round(asgi_rps, 1),
+        }
+    return results
+
+
+def timed_get(client, url, repeat, **headers):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, **headers)
+        timings.append((time.perf_counter() - start) * 1000)
+    return response, round(percentile(timings, 0.5), 3)
+
+
+def api_comparison(repeat=20):
+    """Байты и p50 страниц JSON API (с gzip и без) против HTML."""
+    ctx = Context()
+    values = ctx.kwargs(['slug', 'username', 'post_id'])
+    results = {}
+    for name, converters in routes():
+        if name not in API_PAIRS:
+            continue
+        html_url = reverse(name, kwargs=ctx.kwargs(converters))
+        api_name, filters = API_PAIRS[name]
+        api_kwargs = ({'post_id': values['post_id']}
+                      if api_name == 'api:comments' else {})
+        params = {key: values[value] for key, value in filters.items()}
+        params.update(include='author', limit=PAGINATE_BY)
+        api_url = f'{reverse(api_name, kwargs=api_kwargs)}?{urlencode(params)}'
+        html, html_ms = timed_get(ctx.client, html_url, repeat)
+        api, api_ms = timed_get(ctx.client, api_url, repeat)
+        packed, packed_ms = timed_get(
+            ctx.client, api_url, repeat, HTTP_ACCEPT_ENCODING='gzip, br')
+        results[name] = {
+            'html_bytes': len(html.content),
+            'html_ms': html_ms,
+            'api_bytes': len(api.content),
+            'api_ms': api_ms,
+            'api_compressed_bytes': len(packed.content),
+            'api_compressed_ms': packed_ms,
+        }
+    return results
+
+
+def template_settings(cached):
+    """TEMPLATES как в dev (cached=False) или как в prod (cached=True)."""
+    template, = settings.TEMPLATES
+    options = dict(template['OPTIONS'])
+    options.pop('loaders', None)
+    if cached:
+        options.update(debug=False, loaders=CACHED_LOADERS)
+        return [{**template, 'APP_DIRS': False, 'OPTIONS': options}]
+    options.update(debug=True)
+    return [{**template, 'APP_DIRS': True, 'OPTIONS': options}]
+
+
+def template_render(repeat=100):
+    """p50 и p95 отрисовки posts/index.html со страницей из PAGINATE_BY
+    постов: загрузчики по умолчанию против кеширующего с прогревом.
+
+    Карточки постов отрисовываются заново на каждом повторе (кеш
+    очищается), а запросы к базе сделаны заранее: замеряются только
+    шаблоны.
+    """
+    ctx = Context()
+    request = RequestFactory().get(reverse('posts:index'))
+    request.user = ctx.author
+    page_obj = Paginator(Post.objects.for_feed(), PAGINATE_BY).page(1)
+    page_obj.object_list = list(page_obj.object_list)
+    page_obj.paginator.num_pages
+    context = {'index': True, 'page_obj': page_obj}
+    results = {}
+    for name, cached in (('default', False), ('cached', True)):
+        with override_settings(TEMPLATES=template_settings(cached)):
+            warm_up()
+            timings = []
+            for _ in range(repeat):
+                cache.clear()
+                start = time.perf_counter()
+                render_to_string('posts/index.html', context, request)
+                timings.append((time.perf_counter() - start) * 1000)
+        results[name] = {
+            'p50_ms': round(percentile(timings, 0.5), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+        }
+    return results
@@ -0,0 +1,325 @@
+"""Кеш-бэкенды: общий кеш на сервере Redis и двухуровневый near-кеш.
+
+RedisCache хранит записи на сервере, общем для всех процессов. Целые
+числа пишутся как есть, чтобы incr выполнялся на сервере (INCRBY),
+остальное — через pickle. С OPTIONS['FAIL_OPEN'] недоступный сервер не
+роняет страницы: чтение считается промахом, запись пропускается, а
+следующая попытка соединиться будет не раньше чем через RETRY_AFTER
+секунд.
+
+NearCache держит перед любым общим кешем (алиас в OPTIONS['SHARED'])
+небольшой LRU в памяти процесса. Размер LRU ограничен числом записей и
+суммой байт, а запись живёт в нём не дольше LOCAL_TIMEOUT секунд, поэтому
+изменения из других процессов видны с задержкой не больше LOCAL_TIMEOUT.
+Ключи с префиксами из BYPASS_PREFIXES (например, версии лент, которыми
+инвалидируется остальной кеш) всегда читаются из общего кеша.
+"""
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .resp import Client, ResponseError
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+def dumps(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value).encode()
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def loads(data):
+    try:
+        return int(data)
+    except ValueError:
+        return pickle.loads(data)
+
+
+class RedisCache(BaseCache):
+    """Кеш на сервере Redis; LOCATION — адрес вида redis://host:6379/0."""
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.client = Client(server, options.get('SOCKET_TIMEOUT', 1))
+        self.fail_open = options.get('FAIL_OPEN', False)
+        self.retry_after = options.get('RETRY_AFTER', 5)
+        self.down_until = 0
+
+    def pipeline(self, commands, default):
+        """Ответы сервера; при FAIL_OPEN и ошибке соединения — default."""
+        if self.fail_open and time.monotonic() < self.down_until:
+            return default
+        try:
+            return self.client.pipeline(commands)
+        except OSError:
+            if not self.fail_open:
+                raise
+            logger.warning('Сервер кеша недоступен', exc_info=True)
+            self.down_until = time.monotonic() + self.retry_after
+            return default
+
+    def execute(self, *args, default=None):
+        return self.pipeline([args], [default])[0]
+
+    def ttl_ms(self, timeout):
+        """Срок жизни в миллисекундах; None — бессрочно."""
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return int(timeout * 1000)
+
+    def set_command(self, key, value, timeout, *flags):
+        command = ['SET', key, dumps(value), *flags]
+        ttl = self.ttl_ms(timeout)
+        if ttl is not None:
+            command += ['PX', max(ttl, 1)]
+        return command
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None \
+                and timeout <= 0:
+            return False
+        command = self.set_command(key, value, timeout, 'NX')
+        # Без сервера add считается успешным: иначе запросы ждали бы
+        # блокировок (feed_cache), которые никто не держит.
+        return self.execute(*command, default='OK') is not None
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        data = self.execute('GET', key)
+        return default if data is None else loads(data)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        keys = {self.make_key(key, version=version): value
+                for key, value in data.items()}
+        for key in keys:
+            self.validate_key(key)
+        ttl = self.ttl_ms(timeout)
+        if ttl is not None and ttl <= 0:
+            self.execute('DEL', *keys)
+            return []
+        replies = self.pipeline([
+            self.set_command(key, value, timeout)
+            for key, value in keys.items()
+        ], None)
+        return list(data) if replies is None else []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        ttl = self.ttl_ms(timeout)
+        if ttl is None:
+            return bool(self.execute('EXISTS', key))
+        return bool(self.execute('PEXPIRE', key, max(ttl, 1)))
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_key(key, version=version) for key in keys]
+        for key in keys:
+            self.validate_key(key)
+        if keys:
+            self.execute('DEL', *keys)
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_key(key, version=version): key for key in keys}
+        for key in keys:
+            self.validate_key(key)
+        if not keys:
+            return {}
+        values = self.execute('MGET', *keys, default=[])
+        return {
+            original: loads(data)
+            for original, data in zip(keys.values(), values)
+            if data is not None
+        }
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return bool(self.execute('EXISTS', key))
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        if not self.execute('EXISTS', key):
+            raise ValueError(f"Key '{key}' not found")
+        try:
+            value = self.execute('INCRBY', key, delta)
+        except ResponseError as error:
+            raise ValueError(str(error))
+        if value is None:
+            raise ValueError(f"Key '{key}' not found")
+        return value
+
+    def clear(self):
+        self.execute('FLUSHDB')
+
+    def close(self, **kwargs):
+        # Соединения потоков переживают запрос, как в других бэкендах
+        # с пулом соединений.
+        pass
+
+
+class NearCache(BaseCache):
+    """Ограниченный LRU процесса перед общим кешем."""
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.max_bytes = options.get('MAX_BYTES', 16 * 1024 * 1024)
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.bypass_prefixes = tuple(options.get('BYPASS_PREFIXES', ()))
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def local_key(self, key, version):
+        return self.shared.make_key(key, version=version)
+
+    def bypass(self, key):
+        return key.startswith(self.bypass_prefixes)
+
+    def remember(self, key, version, value, timeout=DEFAULT_TIMEOUT):
+        if self.bypass(key):
+            return
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.shared.default_timeout
+        lifetime = self.local_timeout
+        if timeout is not None:
+            lifetime = min(lifetime, timeout)
+        local_key = self.local_key(key, version)
+        if lifetime <= 0:
+            self.forget(local_key)
+            return
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            self.forget(local_key)
+            return
+        with self.lock:
+            self.pop(local_key)
+            self.entries[local_key] = (time.monotonic() + lifetime, data)
+            self.size += len(data)
+            while (len(self.entries) > self._max_entries
+                   or self.size > self.max_bytes):
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def recall(self, key, version):
+        """Значение из LRU процесса или MISSING."""
+        if self.bypass(key):
+            return MISSING
+        local_key = self.local_key(key, version)
+        with self.lock:
+            entry = self.entries.get(local_key)
+            if entry is None:
+                return MISSING
+            expires, data = entry
+            if expires <= time.monotonic():
+                self.pop(local_key)
+                return MISSING
+            self.entries.move_to_end(local_key)
+        return pickle.loads(data)
+
+    def pop(self, local_key):
+        entry = self.entries.pop(local_key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def forget(self, local_key):
+        with self.lock:
+            self.pop(local_key)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version)
+        if added:
+            self.remember(key, version, value, timeout)
+        return added
+
+    def get(self, key, default=None, version=None):
+        value = self.recall(key, version)
+        if value is MISSING:
+            value = self.shared.get(key, MISSING, version)
+            if value is MISSING:
+                return default
+            self.remember(key, version, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.recall(key, version)
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            fetched = self.shared.get_many(missing, version)
+            for key, value in fetched.items():
+                self.remember(key, version, value)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        self.remember(key, version, value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        for key, value in data.items():
+            if key not in failed:
+                self.remember(key, version, value, timeout)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.forget(self.local_key(key, version))
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self.forget(self.local_key(key, version))
+        self.shared.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.forget(self.local_key(key, version))
+        self.shared.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        if self.recall(key, version) is not MISSING:
+            return True
+        return self.shared.has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        self.forget(self.local_key(key, version))
+        return self.shared.incr(key, delta, version)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+        self.shared.clear()
@@ -0,0 +1,139 @@
+"""Минимальный клиент протокола Redis (RESP2).
+
+Поддерживает ровно то, что нужно кеш-бэкенду: отправку команд, конвейер
+из нескольких команд за один проход по сети, AUTH и SELECT при
+подключении. У каждого потока своё соединение; после fork соединения
+открываются заново.
+"""
+import os
+import socket
+import threading
+from urllib.parse import unquote, urlparse
+
+DEFAULT_PORT = 6379
+CRLF = b'\r\n'
+# Команды, которые можно безопасно отправить повторно (SET — без NX).
+IDEMPOTENT = frozenset({'GET', 'MGET', 'EXISTS', 'SET', 'DEL', 'PEXPIRE',
+                        'FLUSHDB', 'PING'})
+
+
+class ResponseError(Exception):
+    """Сервер ответил ошибкой (-ERR ...)."""
+
+
+def parse_url(url):
+    """Параметры подключения из redis://[:password@]host[:port][/db]."""
+    parts = urlparse(url)
+    if parts.scheme != 'redis':
+        raise ValueError(f'Ожидается адрес redis://, получен {url!r}.')
+    return {
+        'host': parts.hostname or 'localhost',
+        'port': parts.port or DEFAULT_PORT,
+        'db': int(parts.path.lstrip('/') or 0),
+        'password': unquote(parts.password) if parts.password else None,
+    }
+
+
+def idempotent(args):
+    name = str(args[0]).upper()
+    if name == 'SET':
+        return 'NX' not in args and 'XX' not in args
+    return name in IDEMPOTENT
+
+
+def encode_command(args):
+    chunks = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+        chunks.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(chunks)
+
+
+class Connection:
+    def __init__(self, host, port, db=0, password=None, timeout=None):
+        self.sock = socket.create_connection((host, port), timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile('rb')
+        if password:
+            self.execute('AUTH', password)
+        if db:
+            self.execute('SELECT', db)
+
+    def execute(self, *args):
+        return self.pipeline([args])[0]
+
+    def pipeline(self, commands):
+        """Отправляет команды одним пакетом и читает ответы по порядку."""
+        self.sock.sendall(b''.join(encode_command(args) for args in commands))
+        replies = [self.read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, ResponseError):
+                raise reply
+        return replies
+
+    def read_reply(self):
+        line = self.reader.readline()
+        if not line.endswith(CRLF):
+            raise ConnectionError('Соединение с сервером кеша закрыто.')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            return ResponseError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length == -1:
+                return None
+            return self.reader.read(length + 2)[:-2]
+        if kind == b'*':
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self.read_reply() for _ in range(length)]
+        raise ConnectionError(f'Неизвестный ответ сервера: {line!r}.')
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+class Client:
+    """Клиент с отдельным соединением на поток."""
+
+    def __init__(self, url, timeout=None):
+        self.params = dict(parse_url(url), timeout=timeout)
+        self.local = threading.local()
+
+    def connection(self):
+        local = self.local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.connection, local.pid = None, os.getpid()
+        if local.connection is None:
+            local.connection = Connection(**self.params)
+        return local.connection
+
+    def pipeline(self, commands):
+        try:
+            return self.connection().pipeline(commands)
+        except OSError:
+            # Сервер мог закрыть простаивающее соединение: одна попытка
+            # с новым соединением. Часть команд могла уже выполниться,
+            # поэтому повторяются только идемпотентные (не INCRBY).
+            self.disconnect()
+            if not all(idempotent(args) for args in commands):
+                raise
+            return self.connection().pipeline(commands)
+
+    def execute(self, *args):
+        return self.pipeline([args])[0]
+
+    def disconnect(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+        self.local.connection = None
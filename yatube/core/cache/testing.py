@@ -0,0 +1,146 @@
+"""Поддельный сервер Redis в памяти процесса для тестов.
+
+Понимает команды, которыми пользуется RedisCache, и отвечает по
+протоколу RESP2, так что тесты проверяют настоящий обмен по сокету без
+внешнего сервиса.
+"""
+import socketserver
+import threading
+import time
+
+
+def bulk(value):
+    if value is None:
+        return b'$-1\r\n'
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+class Store:
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+
+    def alive(self, key):
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def get(self, key):
+        return self.data[key] if self.alive(key) else None
+
+    def set(self, key, value, args):
+        flags = [arg.upper() for arg in args]
+        if b'NX' in flags and self.alive(key):
+            return bulk(None)
+        if b'XX' in flags and not self.alive(key):
+            return bulk(None)
+        self.data[key] = value
+        self.expires.pop(key, None)
+        for unit, scale in ((b'PX', 1000), (b'EX', 1)):
+            if unit in flags:
+                ttl = int(args[flags.index(unit) + 1])
+                self.expires[key] = time.monotonic() + ttl / scale
+        return b'+OK\r\n'
+
+    def command(self, name, args):
+        handler = getattr(self, f'cmd_{name.decode().lower()}', None)
+        if handler is None:
+            return b"-ERR unknown command '%s'\r\n" % name
+        return handler(args)
+
+    def cmd_ping(self, args):
+        return b'+OK\r\n'
+
+    cmd_select = cmd_auth = cmd_ping
+
+    def cmd_get(self, args):
+        return bulk(self.get(args[0]))
+
+    def cmd_set(self, args):
+        return self.set(args[0], args[1], args[2:])
+
+    def cmd_mget(self, args):
+        return b'*%d\r\n' % len(args) + b''.join(
+            bulk(self.get(key)) for key in args)
+
+    def cmd_del(self, args):
+        deleted = [key for key in args if self.alive(key)]
+        for key in deleted:
+            del self.data[key]
+            self.expires.pop(key, None)
+        return b':%d\r\n' % len(deleted)
+
+    def cmd_exists(self, args):
+        return b':%d\r\n' % sum(self.alive(key) for key in args)
+
+    def cmd_incrby(self, args):
+        try:
+            value = int(self.get(args[0]) or 0) + int(args[1])
+        except ValueError:
+            return b'-ERR value is not an integer or out of range\r\n'
+        self.data[args[0]] = str(value).encode()
+        return b':%d\r\n' % value
+
+    def cmd_pexpire(self, args):
+        if not self.alive(args[0]):
+            return b':0\r\n'
+        self.expires[args[0]] = time.monotonic() + int(args[1]) / 1000
+        return b':1\r\n'
+
+    def cmd_flushdb(self, args):
+        self.data.clear()
+        self.expires.clear()
+        return b'+OK\r\n'
+
+    def cmd_dbsize(self, args):
+        return b':%d\r\n' % sum(self.alive(key) for key in list(self.data))
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            with self.server.store.lock:
+                self.server.commands += 1
+                reply = self.server.store.command(args[0].upper(), args[1:])
+            self.wfile.write(reply)
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Сервер на случайном порту 127.0.0.1; url — адрес для LOCATION."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.store = Store()
+        self.commands = 0
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f'redis://{host}:{port}/0'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
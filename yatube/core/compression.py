@@ -0,0 +1,57 @@
+"""Сжатие ответов: brotli, если клиент его принимает и установлен пакет
+brotli, иначе gzip.
+
+Для API, ответы которого — длинный однообразный JSON. Middleware
+подключается к отдельным view декоратором compress.
+"""
+import re
+
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import decorator_from_middleware
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_LENGTH = 200
+BR_QUALITY = 5
+
+
+def accepts(request, encoding):
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return bool(re.search(rf'\b{encoding}\b(?!;q=0(\.0*)?\b)', header))
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response=None):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.process_response(request, self.get_response(request))
+
+    def process_response(self, request, response):
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if (response.streaming or response.has_header('Content-Encoding')
+                or len(response.content) < MIN_LENGTH):
+            return response
+        if brotli is not None and accepts(request, 'br'):
+            content = brotli.compress(response.content, quality=BR_QUALITY)
+            encoding = 'br'
+        elif accepts(request, 'gzip'):
+            content = compress_string(response.content)
+            encoding = 'gzip'
+        else:
+            return response
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^"', 'W/"', response['ETag'])
+        return response
+
+
+compress = decorator_from_middleware(CompressionMiddleware)
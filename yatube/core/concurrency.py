@@ -0,0 +1,106 @@
+"""Параллельное выполнение независимых запросов к базе внутри view.
+
+У каждого потока Django своё соединение с базой, поэтому запросы из
+run_concurrently идут по разным соединениям одновременно. В потоки пула
+переносится состояние запроса: маршрутизация (core.db: чтение с реплики,
+закрепление за основной базой), профиль core.profiling, обёртки
+execute_wrapper и журнал запросов соединений. Поэтому CaptureQueriesContext,
+assertNumQueries и профилирование видят запросы из потоков пула.
+
+Пул один на процесс, но запрос не ждёт в его очереди: функция уходит в
+пул, только если там есть свободный поток, иначе выполняется в потоке
+запроса. Первая функция всегда выполняется в потоке запроса.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+
+from . import db, profiling
+
+executor = None
+slots = None
+executor_lock = threading.Lock()
+
+
+def get_executor():
+    global executor, slots
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                settings.VIEW_QUERY_WORKERS, thread_name_prefix='view-query')
+            slots = threading.BoundedSemaphore(settings.VIEW_QUERY_WORKERS)
+    return executor
+
+
+def request_context():
+    """Состояние потока запроса, которое нужно потокам пула."""
+    return {
+        'routing': dict(db.state.__dict__),
+        'profiling': dict(profiling.state.__dict__),
+        'connections': {
+            alias: connections[alias] for alias in connections
+        },
+    }
+
+
+def enter_context(context):
+    db.state.__dict__.update(context['routing'])
+    profiling.state.__dict__.update(context['profiling'])
+    close_old_connections()
+    for alias, parent in context['connections'].items():
+        worker = connections[alias]
+        instrumented = parent.queries_logged or parent.execute_wrappers
+        if instrumented and parent.connection is not None:
+            # Служебные запросы при подключении (PRAGMA в core.apps) в потоке
+            # запроса уже выполнены, в журнал они попадать не должны.
+            worker.ensure_connection()
+        worker.force_debug_cursor = parent.force_debug_cursor
+        worker.execute_wrappers[:] = parent.execute_wrappers
+        worker.queries_log.clear()
+
+
+def exit_context(context):
+    for alias, parent in context['connections'].items():
+        worker = connections[alias]
+        if parent.queries_logged:
+            parent.queries_log.extend(worker.queries_log)
+        worker.queries_log.clear()
+        worker.execute_wrappers.clear()
+        worker.force_debug_cursor = False
+    db.state.__dict__.clear()
+    profiling.state.__dict__.clear()
+    close_old_connections()
+
+
+def run_in_worker(context, function):
+    enter_context(context)
+    try:
+        return function()
+    finally:
+        exit_context(context)
+        slots.release()
+
+
+def run_concurrently(*functions):
+    """Результаты функций в том же порядке.
+
+    Внутри транзакции функции выполняются по очереди в текущем потоке:
+    другие соединения не видят её незафиксированных изменений.
+    """
+    if (connection.in_atomic_block or len(functions) < 2
+            or not settings.VIEW_QUERY_WORKERS):
+        return [function() for function in functions]
+    pool = get_executor()
+    context = request_context()
+    first, *rest = functions
+    pending = [
+        pool.submit(run_in_worker, context, function)
+        if slots.acquire(blocking=False) else function
+        for function in rest
+    ]
+    results = [first()]
+    for item in pending:
+        results.append(item() if callable(item) else item.result())
+    return results
@@ -0,0 +1,133 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment,
+)
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет число запросов, p50/p95 задержки и пиковую память всех '
+        'маршрутов posts и users на синтетических данных в отдельной '
+        'тестовой базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=5000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом.',
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не пересоздавать и не наполнять заново тестовую базу.',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=0,
+            help='Замерить пропускную способность лент при стольких '
+                 'одновременных клиентах (WSGI и ASGI).',
+        )
+        parser.add_argument(
+            '--api', action='store_true',
+            help='Сравнить размер и время страниц JSON API и HTML.',
+        )
+        parser.add_argument(
+            '--templates', action='store_true',
+            help='Сравнить отрисовку главной с загрузчиками по умолчанию '
+                 'и с кеширующим загрузчиком.',
+        )
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--baseline')
+        parser.add_argument('--tolerance', type=float, default=0.2)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            self.seed(options)
+            results, extras = self.measure(options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+        with open(options['output'], 'w') as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+        self.report(results, *extras)
+        if options['baseline']:
+            self.check_baseline(results, options)
+
+    def seed(self, options):
+        if options['keepdb'] and benchmark.User.objects.exists():
+            return
+        benchmark.seed(
+            users=options['users'],
+            posts=options['posts'],
+            follows=options['follows'],
+            comments=options['comments'],
+            groups=options['groups'],
+        )
+
+    def measure(self, options):
+        """Результаты по маршрутам и дополнительные замеры по флагам."""
+        results = benchmark.run(options['repeat'], options['cold'])
+        rates = sizes = renders = {}
+        if options['concurrency']:
+            rates = benchmark.throughput(
+                options['concurrency'], options['repeat'] * 10)
+        if options['api']:
+            sizes = benchmark.api_comparison(options['repeat'])
+        for extra in (rates, sizes):
+            for name, values in extra.items():
+                results[name].update(values)
+        if options['templates']:
+            renders = benchmark.template_render(options['repeat'] * 5)
+        return results, (rates, sizes, renders)
+
+    def report(self, results, rates, sizes, renders):
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:35} {result["queries"]:4} q '
+                f'p50 {result["p50_ms"]:8.2f} ms '
+                f'p95 {result["p95_ms"]:8.2f} ms '
+                f'{result["peak_kb"]:10.1f} KB'
+            )
+        for name, rate in rates.items():
+            self.stdout.write(
+                f'{name:35} sync {rate["sync_rps"]:8.1f} rps '
+                f'wsgi {rate["wsgi_rps"]:8.1f} rps '
+                f'asgi {rate["asgi_rps"]:8.1f} rps'
+            )
+        for name, size in sizes.items():
+            self.stdout.write(
+                f'{name:35} html {size["html_bytes"]:7} B '
+                f'{size["html_ms"]:7.2f} ms  api {size["api_bytes"]:7} B '
+                f'{size["api_ms"]:7.2f} ms  '
+                f'сжатый {size["api_compressed_bytes"]:7} B '
+                f'{size["api_compressed_ms"]:7.2f} ms'
+            )
+        for name, render in renders.items():
+            self.stdout.write(
+                f'posts/index.html {name:10} '
+                f'p50 {render["p50_ms"]:8.2f} ms '
+                f'p95 {render["p95_ms"]:8.2f} ms'
+            )
+
+    def check_baseline(self, results, options):
+        with open(options['baseline']) as baseline:
+            regressions = benchmark.compare(
+                results, json.load(baseline), options['tolerance'])
+        if regressions:
+            raise CommandError(
+                'Регрессии производительности:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,32 @@
+from django.conf import settings
+
+from . import db
+
+PIN_COOKIE = 'primary_pin'
+# Модули view, запись из которых закрепляет браузер за основной базой.
+PIN_VIEW_MODULES = ('posts.views', 'api.views')
+
+
+class PrimaryPinMiddleware:
+    """Чтение своих записей при репликах.
+
+    После записи во view из PIN_VIEW_MODULES браузер REPLICA_PIN_SECONDS
+    секунд читает только из основной базы: за это время реплики получают
+    запись.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with db.pin_to_primary(PIN_COOKIE in request.COOKIES) as state:
+            response = self.get_response(request)
+            wrote = state.wrote
+        if wrote and getattr(request, 'pin_view', False) and db.replicas():
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.pin_view = view_func.__module__ in PIN_VIEW_MODULES
@@ -10,3 +10,14 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class UpdatedModel(models.Model):
+    """Абстрактная модель. Добавляет дату последнего изменения."""
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
+
+    class Meta:
+        abstract = True
@@ -0,0 +1,324 @@
+"""Профилирование запросов: запросы к базе, шаблоны, кеш, медленный лог.
+
+ProfilingMiddleware включается настройкой PROFILING_ENABLED и собирает
+по каждому запросу к posts, users и about (PROFILING_NAMESPACES) число
+запросов к базе и их время, время отрисовки шаблонов и попадания в кеш.
+Запросы дольше PROFILING_SLOW_REQUEST_MS пишутся в лог 'yatube.profiling'
+с SQL, местом вызова в коде проекта и повторами одинаковых запросов.
+
+Сводка по view отдаётся в текстовом формате Prometheus (view metrics,
+только при включённом профилировании).
+Гистограммы — фиксированные наборы корзин, а число view ограничено
+PROFILING_MAX_SERIES, поэтому память не растёт со временем. Сводка своя
+у каждого процесса; Prometheus складывает их по меткам инстанса.
+"""
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed, PermissionDenied
+from django.db import connections
+from django.http import HttpResponse
+from django.template.base import Template
+
+logger = logging.getLogger('yatube.profiling')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+OTHER_VIEW = 'other'
+MISSING = object()
+
+state = threading.local()
+
+
+class Profile:
+    """Замеры одного запроса."""
+
+    def __init__(self):
+        self.queries = []
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def db_time(self):
+        return sum(query['duration'] for query in self.queries)
+
+    def duplicates(self):
+        """Одинаковые запросы (SQL и параметры), выполненные больше раза."""
+        counts = Counter(
+            (query['sql'], query['params']) for query in self.queries)
+        return [(sql, count) for (sql, _), count in counts.items()
+                if count > 1]
+
+
+def current():
+    return getattr(state, 'profile', None)
+
+
+def origin():
+    """Место вызова в коде проекта: файл:строка функция."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(settings.BASE_DIR)
+                and filename != __file__
+                and f'{os.sep}site-packages{os.sep}' not in filename):
+            path = os.path.relpath(filename, settings.BASE_DIR)
+            return f'{path}:{frame.f_lineno} {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+def record_query(execute, sql, params, many, context):
+    profile = current()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries.append({
+            'sql': sql,
+            'params': repr(params),
+            'duration': time.perf_counter() - start,
+            'origin': origin(),
+        })
+
+
+def instrument_templates():
+    if getattr(Template.render, 'profiled', False):
+        return
+    render = Template.render
+
+    @wraps(render)
+    def profiled_render(self, context):
+        profile = current()
+        if profile is None:
+            return render(self, context)
+        # Вложенные шаблоны (include, extends) уже входят во внешний.
+        profile.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            profile.template_depth -= 1
+            if not profile.template_depth:
+                profile.template_time += time.perf_counter() - start
+
+    profiled_render.profiled = True
+    Template.render = profiled_render
+
+
+def instrument_cache(backend_class):
+    if getattr(backend_class.get, 'profiled', False):
+        return
+    get, get_many = backend_class.get, backend_class.get_many
+
+    @wraps(get)
+    def profiled_get(self, key, default=None, version=None):
+        value = get(self, key, MISSING, version)
+        profile = current()
+        if profile is not None:
+            if value is MISSING:
+                profile.cache_misses += 1
+            else:
+                profile.cache_hits += 1
+        return default if value is MISSING else value
+
+    @wraps(get_many)
+    def profiled_get_many(self, keys, version=None):
+        keys = list(keys)
+        values = get_many(self, keys, version)
+        profile = current()
+        if profile is not None:
+            profile.cache_hits += len(values)
+            profile.cache_misses += len(keys) - len(values)
+        return values
+
+    profiled_get.profiled = True
+    backend_class.get = profiled_get
+    backend_class.get_many = profiled_get_many
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.buckets)
+                      if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.total += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.total:.6f}'
+        yield f'{name}_count{{{labels}}} {cumulative}'
+
+
+class ViewStats:
+    def __init__(self):
+        self.requests = 0
+        self.slow = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.db_duration = Histogram(DURATION_BUCKETS)
+        self.template_duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+
+
+class Registry:
+    """Сводка по view с ограниченным числом серий."""
+
+    def __init__(self):
+        self.views = {}
+        self.lock = threading.Lock()
+
+    def add(self, view, profile, duration, slow):
+        with self.lock:
+            if (view not in self.views
+                    and len(self.views) >= settings.PROFILING_MAX_SERIES):
+                view = OTHER_VIEW
+            stats = self.views.setdefault(view, ViewStats())
+            stats.requests += 1
+            stats.slow += slow
+            stats.cache_hits += profile.cache_hits
+            stats.cache_misses += profile.cache_misses
+            stats.duration.observe(duration)
+            stats.db_duration.observe(profile.db_time)
+            stats.template_duration.observe(profile.template_time)
+            stats.queries.observe(len(profile.queries))
+
+    def exposition(self):
+        """Текст в формате Prometheus."""
+        counters = (
+            ('requests', 'Запросы'),
+            ('slow', 'Медленные запросы'),
+            ('cache_hits', 'Попадания в кеш'),
+            ('cache_misses', 'Промахи кеша'),
+        )
+        histograms = (
+            ('duration', 'yatube_request_duration_seconds'),
+            ('db_duration', 'yatube_db_duration_seconds'),
+            ('template_duration', 'yatube_template_duration_seconds'),
+            ('queries', 'yatube_db_queries'),
+        )
+        with self.lock:
+            views = sorted(self.views.items())
+            lines = []
+            for attribute, help_text in counters:
+                name = f'yatube_{attribute}_total'
+                lines += [f'# HELP {name} {help_text}.',
+                          f'# TYPE {name} counter']
+                lines += [
+                    f'{name}{{view="{view}"}} {getattr(stats, attribute)}'
+                    for view, stats in views
+                ]
+            for attribute, name in histograms:
+                lines.append(f'# TYPE {name} histogram')
+                for view, stats in views:
+                    lines += getattr(stats, attribute).lines(
+                        name, f'view="{view}"')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self.lock:
+            self.views.clear()
+
+
+registry = Registry()
+
+
+def log_slow(request, view, profile, duration):
+    lines = [
+        f'Медленный запрос {request.method} {request.get_full_path()} '
+        f'({view}): {duration * 1000:.1f} мс, '
+        f'{len(profile.queries)} запросов к базе за '
+        f'{profile.db_time * 1000:.1f} мс, шаблоны '
+        f'{profile.template_time * 1000:.1f} мс, кеш '
+        f'{profile.cache_hits}/{profile.cache_hits + profile.cache_misses}',
+    ]
+    for query in profile.queries:
+        lines.append(f'  {query["duration"] * 1000:7.2f} мс  '
+                     f'{query["origin"]}  {query["sql"]}')
+    for sql, count in profile.duplicates():
+        lines.append(f'  повторён {count} раз: {sql}')
+    logger.warning('\n'.join(lines))
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrument_templates()
+        instrument_cache(type(caches['default']))
+
+    def __call__(self, request):
+        state.profile = Profile()
+        start = time.perf_counter()
+        try:
+            with self.wrap_connections():
+                response = self.get_response(request)
+        finally:
+            profile, state.profile = state.profile, None
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        if match and match.namespaces and \
+                match.namespaces[0] in settings.PROFILING_NAMESPACES:
+            slow = duration * 1000 >= settings.PROFILING_SLOW_REQUEST_MS
+            registry.add(match.view_name, profile, duration, slow)
+            if slow:
+                log_slow(request, match.view_name, profile, duration)
+        return response
+
+    def wrap_connections(self):
+        return ExecuteWrappers([connections[alias] for alias in connections])
+
+
+class ExecuteWrappers:
+    """execute_wrapper для нескольких соединений сразу."""
+
+    def __init__(self, connections):
+        self.contexts = [connection.execute_wrapper(record_query)
+                         for connection in connections]
+
+    def __enter__(self):
+        for context in self.contexts:
+            context.__enter__()
+
+    def __exit__(self, *exc_info):
+        for context in reversed(self.contexts):
+            context.__exit__(*exc_info)
+
+
+def has_metrics_token(request):
+    """Заголовок Authorization: Bearer с PROFILING_METRICS_TOKEN."""
+    token = settings.PROFILING_METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    scheme, _, value = header.partition(' ')
+    return bool(token) and scheme == 'Bearer' and hmac.compare_digest(
+        value.encode(), token.encode())
+
+
+def metrics(request):
+    """Сводка для Prometheus: для персонала или по PROFILING_METRICS_TOKEN."""
+    if not (request.user.is_staff or has_metrics_token(request)):
+        raise PermissionDenied
+    return HttpResponse(registry.exposition(),
+                        content_type='text/plain; version=0.0.4')
@@ -0,0 +1,58 @@
+"""Прогрев шаблонов: компиляция всех шаблонов проекта при запуске.
+
+С кеширующим загрузчиком скомпилированный шаблон хранится в памяти
+процесса, поэтому после warm_up() ни один запрос, включая шаблоны из
+{% include %}, не читает и не разбирает файлы.
+
+Прогрев запускают точки входа сервера (yatube.wsgi, core.asgi), а не
+AppConfig.ready: иначе migrate и другие команды тоже компилировали бы
+все шаблоны.
+"""
+import logging
+import os
+
+from django.conf import settings
+from django.template import (TemplateDoesNotExist, TemplateSyntaxError,
+                             engines)
+from django.template.backends.django import DjangoTemplates
+from django.template.utils import get_app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt')
+
+
+def template_names(directory):
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            if filename.endswith(TEMPLATE_EXTENSIONS):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def warm_up():
+    """Компилирует шаблоны всех движков Django; отдаёт их число."""
+    compiled = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        engine = backend.engine
+        directories = [*engine.dirs, *get_app_template_dirs('templates')]
+        names = dict.fromkeys(
+            name for directory in directories
+            for name in template_names(directory)
+        )
+        for name in names:
+            try:
+                engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+                logger.debug('Шаблон %s не скомпилирован: %s', name, error)
+            else:
+                compiled += 1
+    return compiled
+
+
+def warm_up_on_startup():
+    """warm_up() при запуске сервера, если включён TEMPLATE_WARMUP."""
+    if settings.TEMPLATE_WARMUP:
+        warm_up()
@@ -0,0 +1,210 @@
+import asyncio
+import threading
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, transaction
+from django.test import Client, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import db, profiling
+from core.asgi import ASGIHandler, build_environ
+from core.concurrency import run_concurrently
+from core.profiling import ExecuteWrappers
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+def call(handler, scope, body=b''):
+    """Сообщение http.response.start и собранное тело ответа."""
+    messages = [{'type': 'http.request', 'body': body}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(handler(scope, receive, send))
+    start, *bodies = sent
+    return start, b''.join(message['body'] for message in bodies)
+
+
+def http_scope(path, query_string=b'', method='GET', headers=()):
+    return {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query_string,
+        'headers': [(b'host', b'testserver'), *headers],
+        'server': ('testserver', 80),
+    }
+
+
+class ASGITests(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='Author')
+        Post.objects.create(author=self.author, text='Пост через ASGI')
+        self.handler = ASGIHandler(threads=2)
+
+    def tearDown(self):
+        self.handler.executor.shutdown()
+
+    def test_feed_page(self):
+        """Лента отдаётся через ASGI."""
+        start, body = call(self.handler, http_scope(reverse('posts:index')))
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/html; charset=utf-8'),
+                      start['headers'])
+        self.assertIn('Пост через ASGI', body.decode())
+
+    def test_query_string(self):
+        """Строка запроса доходит до view."""
+        start, body = call(self.handler, http_scope(
+            reverse('posts:search'), 'q=ASGI'.encode()))
+        self.assertEqual(start['status'], 200)
+        self.assertIn('Пост через ASGI', body.decode())
+
+    def test_streaming(self):
+        """Потоковый ответ уходит клиенту по частям."""
+        def streaming(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return iter([b'one', b'two'])
+
+        handler = ASGIHandler(streaming, threads=1)
+        messages = [{'type': 'http.request', 'body': b''}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(handler(http_scope('/'), receive, send))
+        handler.executor.shutdown()
+        self.assertEqual(
+            [(message.get('body'), message.get('more_body', False))
+             for message in sent[1:]],
+            [(b'one', True), (b'two', True), (b'', False)])
+
+    def test_client_gone(self):
+        """Если клиент ушёл, ответ закрывается и поток пула свободен."""
+        closed = threading.Event()
+
+        class Response:
+            def __iter__(self):
+                while True:
+                    yield b'chunk'
+
+            def close(self):
+                closed.set()
+
+        def endless(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return Response()
+
+        handler = ASGIHandler(endless, threads=1)
+        messages = [{'type': 'http.request', 'body': b''}]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            if message.get('more_body'):
+                raise OSError('Соединение закрыто')
+
+        with self.assertRaises(OSError):
+            asyncio.run(handler(http_scope('/'), receive, send))
+        handler.executor.shutdown()
+        self.assertTrue(closed.is_set())
+
+    def test_lifespan(self):
+        messages = [{'type': 'lifespan.startup'},
+                    {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(self.handler({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, ['lifespan.startup.complete',
+                                'lifespan.shutdown.complete'])
+
+
+class EnvironTests(TransactionTestCase):
+    def test_headers(self):
+        """Заголовки ASGI становятся переменными WSGI."""
+        environ = build_environ(http_scope(
+            '/create/', method='POST', headers=[
+                (b'content-type', b'text/plain'),
+                (b'content-length', b'4'),
+                (b'x-forwarded-for', b'10.0.0.1'),
+            ]), BytesIO(b'body'))
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['CONTENT_LENGTH'], '4')
+        self.assertEqual(environ['HTTP_X_FORWARDED_FOR'], '10.0.0.1')
+        self.assertEqual(environ['wsgi.input'].read(), b'body')
+
+
+class ConcurrencyTests(TransactionTestCase):
+    def test_runs_in_threads_with_routing(self):
+        """Функции после первой выполняются в пуле с состоянием роутера."""
+        with db.use_replica():
+            results = run_concurrently(
+                lambda: (threading.get_ident(), db.state.reads),
+                lambda: (threading.get_ident(), db.state.reads),
+            )
+        self.assertTrue(all(reads == 'replica' for _, reads in results))
+        self.assertEqual(results[0][0], threading.get_ident())
+        self.assertNotEqual(results[1][0], threading.get_ident())
+
+    def test_captures_worker_queries(self):
+        """CaptureQueriesContext видит запросы из потоков пула."""
+        with CaptureQueriesContext(connection) as context:
+            counts = run_concurrently(Post.objects.count, User.objects.count,
+                                      Follow.objects.count)
+        self.assertEqual(counts, [0, 0, 0])
+        self.assertEqual(len(context.captured_queries), 3)
+
+    @override_settings(PROFILING_ENABLED=True)
+    def test_profiling_counts_worker_queries(self):
+        """Профиль запроса учитывает запросы из потоков пула."""
+        profile = profiling.Profile()
+        profiling.state.profile = profile
+        try:
+            with ExecuteWrappers([connections[alias]
+                                  for alias in connections]):
+                run_concurrently(Post.objects.count, User.objects.count)
+        finally:
+            profiling.state.profile = None
+        self.assertEqual(len(profile.queries), 2)
+
+    def test_sequential_in_transaction(self):
+        """Внутри транзакции запросы идут по её соединению."""
+        with transaction.atomic():
+            Post.objects.create(
+                author=User.objects.create_user(username='Author'),
+                text='Не зафиксирован')
+            counts = run_concurrently(Post.objects.count, Post.objects.count)
+        self.assertEqual(counts, [1, 1])
+
+    def test_profile(self):
+        """Профиль собирается из параллельных запросов."""
+        author = User.objects.create_user(username='Author')
+        reader = User.objects.create_user(username='Reader')
+        Post.objects.create(author=author, text='Пост автора')
+        Follow.objects.create(user=reader, author=author)
+        client = Client()
+        client.force_login(reader)
+        response = client.get(reverse('posts:profile', args=['Author']))
+        self.assertTrue(response.context['following'])
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['Пост автора'])
@@ -0,0 +1,66 @@
+from django.test import TestCase, TransactionTestCase
+
+from core import benchmark
+from posts.models import Follow, Post
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        benchmark.seed(users=10, posts=60, follows=20, comments=30, groups=3)
+
+    def test_seed(self):
+        """Синтетические данные создаются вместе с лентами и счётчиками."""
+        self.assertEqual(Post.objects.count(), 60)
+        follow = Follow.objects.select_related('author__profile').first()
+        self.assertEqual(
+            follow.author.profile.posts_count,
+            Post.objects.filter(author=follow.author).count(),
+        )
+
+    def test_run_covers_all_routes(self):
+        """Замер проходит по всем маршрутам posts и users."""
+        results = benchmark.run(repeat=2)
+        self.assertEqual(
+            set(results), {name for name, _ in benchmark.routes()})
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertLess(result['status'], 500)
+                self.assertGreater(result['p95_ms'], 0)
+
+    def test_api_comparison(self):
+        """Страницы API сравниваются с соответствующими HTML."""
+        results = benchmark.api_comparison(repeat=1)
+        self.assertEqual(set(results), set(benchmark.API_PAIRS))
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertLess(result['api_bytes'], result['html_bytes'])
+
+    def test_compare(self):
+        """Рост числа запросов и задержки считается регрессией."""
+        before = {'queries': 3, 'p95_ms': 10.0, 'peak_kb': 100.0}
+        after = {'queries': 4, 'p95_ms': 13.0, 'peak_kb': 100.0}
+        regressions = benchmark.compare(
+            {'posts:index': after}, {'posts:index': before}, tolerance=0.2)
+        self.assertEqual(len(regressions), 2)
+
+    def test_template_render(self):
+        """Отрисовка главной замеряется без кеширующего загрузчика и с ним."""
+        results = benchmark.template_render(repeat=3)
+        self.assertEqual(set(results), {'default', 'cached'})
+        for result in results.values():
+            self.assertGreater(result['p50_ms'], 0)
+
+
+class ThroughputTests(TransactionTestCase):
+    def test_throughput(self):
+        """Пропускная способность лент замеряется для WSGI и ASGI."""
+        benchmark.seed(users=5, posts=20, follows=5, comments=5, groups=2)
+        results = benchmark.throughput(concurrency=2, total=4)
+        self.assertEqual(set(results), set(benchmark.FEED_ROUTES))
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertEqual(result['statuses'], [200])
+                for key in ('sync_rps', 'wsgi_rps', 'asgi_rps'):
+                    self.assertGreater(result[key], 0)
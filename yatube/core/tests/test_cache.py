@@ -0,0 +1,173 @@
+import socket
+import time
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from core.cache.backends import RedisCache
+from core.cache.resp import Client
+from core.cache.testing import FakeRedisServer
+
+SERVER = FakeRedisServer()
+
+
+def setUpModule():
+    SERVER.__enter__()
+
+
+def tearDownModule():
+    SERVER.__exit__(None, None, None)
+
+
+def cache_settings(**near_options):
+    return {
+        'shared': {
+            'BACKEND': 'core.cache.backends.RedisCache',
+            'LOCATION': SERVER.url,
+        },
+        'default': {
+            'BACKEND': 'core.cache.backends.NearCache',
+            'OPTIONS': {
+                'SHARED': 'shared',
+                'MAX_ENTRIES': 3,
+                'LOCAL_TIMEOUT': 60,
+                'BYPASS_PREFIXES': ['feed-version:'],
+                **near_options,
+            },
+        },
+    }
+
+
+class CacheTestCase(SimpleTestCase):
+    def setUp(self):
+        self.settings_override = override_settings(CACHES=cache_settings())
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.shared = caches['shared']
+        self.near = caches['default']
+        self.near.clear()
+
+    def commands(self, action):
+        before = SERVER.commands
+        action()
+        return SERVER.commands - before
+
+
+class RedisCacheTests(CacheTestCase):
+    def test_values(self):
+        """Значения переживают круг через сервер; числа хранятся как есть."""
+        self.shared.set('post', {'text': 'Тестовый пост'})
+        self.shared.set('count', 5)
+        self.assertEqual(self.shared.get('post'), {'text': 'Тестовый пост'})
+        self.assertEqual(self.shared.incr('count', 2), 7)
+        self.assertEqual(self.shared.get('count'), 7)
+        self.assertIsNone(self.shared.get('missing'))
+        with self.assertRaises(ValueError):
+            self.shared.incr('missing')
+
+    def test_many(self):
+        """get_many и set_many занимают по одному обмену с сервером."""
+        data = {f'key{i}': i for i in range(10)}
+        self.assertEqual(self.commands(lambda: self.shared.set_many(data)), 10)
+        self.assertEqual(
+            self.commands(lambda: self.shared.get_many([*data, 'x'])), 1)
+        self.assertEqual(self.shared.get_many([*data, 'x']), data)
+
+    def test_add_and_expiry(self):
+        """add не перезаписывает ключ, запись истекает по timeout."""
+        self.assertTrue(self.shared.add('lock', 1, 0.05))
+        self.assertFalse(self.shared.add('lock', 2))
+        time.sleep(0.1)
+        self.assertFalse(self.shared.has_key('lock'))
+        self.assertTrue(self.shared.add('lock', 3, None))
+        self.shared.delete('lock')
+        self.assertIsNone(self.shared.get('lock'))
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class RedisFailureTests(SimpleTestCase):
+    def test_fail_open(self):
+        """С FAIL_OPEN недоступный сервер — промах, запись пропускается."""
+        cache = RedisCache(f'redis://127.0.0.1:{closed_port()}/0',
+                           {'OPTIONS': {'FAIL_OPEN': True}})
+        with self.assertLogs('core.cache.backends', 'WARNING'):
+            self.assertIsNone(cache.get('key'))
+        cache.set('key', 1)
+        self.assertEqual(cache.get_many(['key']), {})
+        self.assertTrue(cache.add('lock', 1))
+        with self.assertRaises(ValueError):
+            cache.incr('key')
+
+    def test_fail_closed(self):
+        """Без FAIL_OPEN ошибка соединения не скрывается."""
+        cache = RedisCache(f'redis://127.0.0.1:{closed_port()}/0', {})
+        with self.assertRaises(OSError):
+            cache.get('key')
+
+    def test_incr_not_retried(self):
+        """После обрыва повторяются только идемпотентные команды."""
+        client = Client('redis://127.0.0.1:6379/0')
+        broken = patch.object(client, 'connection', **{
+            'return_value.pipeline.side_effect': ConnectionError})
+        with broken as connection:
+            with self.assertRaises(ConnectionError):
+                client.execute('INCRBY', 'key', 1)
+            self.assertEqual(connection.return_value.pipeline.call_count, 1)
+            with self.assertRaises(ConnectionError):
+                client.execute('GET', 'key')
+            self.assertEqual(connection.return_value.pipeline.call_count, 3)
+
+
+class NearCacheTests(CacheTestCase):
+    def test_repeated_reads_are_local(self):
+        """Повторное чтение не обращается к серверу."""
+        self.near.set('card', '<article>')
+        self.assertEqual(self.commands(lambda: self.near.get('card')), 0)
+        self.assertEqual(self.near.get('card'), '<article>')
+
+    def test_other_process_reads_shared(self):
+        """Запись одного процесса видна другому через общий кеш."""
+        self.shared.set('card', '<article>')
+        self.assertEqual(self.near.get('card'), '<article>')
+        self.assertEqual(self.commands(lambda: self.near.get('card')), 0)
+
+    def test_bounded(self):
+        """LRU процесса вытесняет давно не читанные записи."""
+        for i in range(4):
+            self.near.set(f'key{i}', i)
+        self.near.get('key1')
+        self.assertEqual(list(self.near.entries),
+                         [self.shared.make_key(f'key{i}') for i in (2, 3, 1)])
+
+    @override_settings(CACHES=cache_settings(MAX_BYTES=100))
+    def test_bounded_by_bytes(self):
+        """Объём LRU процесса ограничен MAX_BYTES."""
+        near = caches['default']
+        near.set('big', 'x' * 200)
+        near.set('small', 'x')
+        self.assertEqual(list(near.entries), [self.shared.make_key('small')])
+        self.assertEqual(near.get('big'), 'x' * 200)
+
+    @override_settings(CACHES=cache_settings(LOCAL_TIMEOUT=0.05))
+    def test_local_timeout(self):
+        """Изменения других процессов видны через LOCAL_TIMEOUT."""
+        near = caches['default']
+        near.set('card', 'old')
+        self.shared.set('card', 'new')
+        self.assertEqual(near.get('card'), 'old')
+        time.sleep(0.1)
+        self.assertEqual(near.get('card'), 'new')
+
+    def test_versions_bypass_local(self):
+        """Версии лент всегда читаются из общего кеша."""
+        self.near.set('feed-version:index', 1, None)
+        self.shared.incr('feed-version:index')
+        self.assertEqual(self.near.get_many(['feed-version:index']),
+                         {'feed-version:index': 2})
+        self.assertEqual(self.near.incr('feed-version:index'), 3)
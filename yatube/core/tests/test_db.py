@@ -0,0 +1,79 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.test import TestCase
+
+from core.db import (ReplicaRouter, databases_from_env, parse_database_url,
+                     use_primary, use_replica)
+from posts.models import Post
+
+User = get_user_model()
+
+
+class DatabaseSettingsTests(TestCase):
+    def test_sqlite_url(self):
+        """Путь SQLite считается от BASE_DIR."""
+        config = parse_database_url('sqlite:///db.sqlite3', '/srv', 60)
+        self.assertEqual(config['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertEqual(config['NAME'], '/srv/db.sqlite3')
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+
+    def test_postgres_url(self):
+        """Адрес PostgreSQL разбирается на части; с pgbouncer без курсоров."""
+        config = parse_database_url(
+            'postgres://yatube:p%40ss@db:6432/yatube', pooler='pgbouncer')
+        self.assertEqual(
+            [config[key] for key in ('NAME', 'USER', 'PASSWORD', 'HOST',
+                                     'PORT')],
+            ['yatube', 'yatube', 'p@ss', 'db', '6432'],
+        )
+        self.assertTrue(config['DISABLE_SERVER_SIDE_CURSORS'])
+
+    def test_replicas_from_env(self):
+        """Реплики из DATABASE_REPLICA_URLS получают имена replicaN."""
+        databases = databases_from_env({
+            'DATABASE_URL': 'sqlite:///primary.sqlite3',
+            'DATABASE_REPLICA_URLS': 'sqlite:///one.sqlite3, '
+                                     'sqlite:///two.sqlite3',
+            'DATABASE_CONN_MAX_AGE': '0',
+        }, '/srv')
+        self.assertEqual(list(databases),
+                         ['default', 'replica1', 'replica2'])
+        self.assertEqual(databases['replica2']['NAME'], '/srv/two.sqlite3')
+        self.assertEqual(databases['replica1']['CONN_MAX_AGE'], 0)
+
+    def test_sqlite_pragmas(self):
+        """Прагмы выставляются при подключении."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64000)
+
+
+@patch('core.db.replicas', return_value=['replica1'])
+class ReplicaRouterTests(TestCase):
+    router = ReplicaRouter()
+
+    def test_reads_from_primary_by_default(self, replicas):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_feed_reads_from_replica(self, replicas):
+        """Внутри use_replica чтение идёт с реплики, запись — в основную."""
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Post), 'replica1')
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            with use_primary():
+                self.assertEqual(self.router.db_for_read(Post), 'default')
+            self.assertEqual(self.router.db_for_read(Post), 'replica1')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_sessions_and_users_from_primary(self, replicas):
+        """Сессии и пользователи не читаются с отстающей реплики."""
+        with use_replica():
+            for model in (Session, User):
+                with self.subTest(model=model):
+                    self.assertEqual(
+                        self.router.db_for_read(model), 'default')
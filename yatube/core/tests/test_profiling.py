@@ -0,0 +1,132 @@
+from importlib import reload
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import NoReverseMatch, clear_url_caches, reverse
+
+from core.profiling import Histogram, Profile, registry
+from yatube import urls
+from posts.models import Post
+
+User = get_user_model()
+
+
+def reload_urls():
+    """Маршрут /metrics зависит от PROFILING_ENABLED на момент импорта."""
+    reload(urls)
+    clear_url_caches()
+
+
+@override_settings(PROFILING_ENABLED=True,
+                   PROFILING_METRICS_TOKEN='secret-token')
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reload_urls()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.staff = User.objects.create_user(username='Staff', is_staff=True)
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        reload_urls()
+
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        self.client = Client()
+
+    def metrics(self):
+        return self.client.get(
+            reverse('metrics'),
+            HTTP_AUTHORIZATION='Bearer secret-token').content.decode()
+
+    def test_request_recorded(self):
+        """Запрос к posts попадает в сводку с запросами, шаблонами и кешем."""
+        self.client.get(reverse('posts:index'))
+        stats = registry.views['posts:index']
+        self.assertEqual(stats.requests, 1)
+        self.assertGreater(stats.queries.total, 0)
+        self.assertGreater(stats.template_duration.total, 0)
+        self.assertGreater(stats.cache_hits + stats.cache_misses, 0)
+        self.assertIn('yatube_requests_total{view="posts:index"} 1',
+                      self.metrics())
+
+    def test_other_apps_skipped(self):
+        """Запросы вне PROFILING_NAMESPACES не учитываются."""
+        self.client.get(reverse('api:posts'))
+        self.assertNotIn('api:posts', registry.views)
+
+    @override_settings(PROFILING_SLOW_REQUEST_MS=0)
+    def test_slow_request_logged(self):
+        """Медленный запрос пишется в лог с SQL и местом вызова."""
+        with self.assertLogs('yatube.profiling', 'WARNING') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('posts:index', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+        self.assertIn('posts/', logs.output[0])
+        self.assertEqual(registry.views['posts:index'].slow, 1)
+
+    @override_settings(PROFILING_MAX_SERIES=1)
+    def test_series_bounded(self):
+        """Сверх PROFILING_MAX_SERIES view попадают в серию other."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('about:author'))
+        self.assertEqual(set(registry.views), {'posts:index', 'other'})
+
+    def test_metrics_forbidden(self):
+        """Сводка закрыта без токена, с чужим токеном и для не-персонала."""
+        self.assertEqual(
+            self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1')
+            .status_code, 403)
+        self.assertEqual(
+            self.client.get(reverse('metrics'),
+                            HTTP_AUTHORIZATION='Bearer wrong').status_code,
+            403)
+        self.client.force_login(self.user)
+        self.assertEqual(
+            self.client.get(reverse('metrics')).status_code, 403)
+
+    def test_metrics_staff(self):
+        """Персоналу сводка доступна без токена."""
+        self.client.force_login(self.staff)
+        self.assertEqual(
+            self.client.get(reverse('metrics')).status_code, 200)
+
+    @override_settings(PROFILING_METRICS_TOKEN='')
+    def test_empty_token_rejected(self):
+        """Пустой PROFILING_METRICS_TOKEN не открывает сводку."""
+        response = self.client.get(reverse('metrics'),
+                                   HTTP_AUTHORIZATION='Bearer ')
+        self.assertEqual(response.status_code, 403)
+
+    def test_duplicates(self):
+        """Повторённые запросы находятся по SQL и параметрам."""
+        profile = Profile()
+        for params in ('(1,)', '(1,)', '(2,)'):
+            profile.queries.append({'sql': 'SELECT %s', 'params': params,
+                                    'duration': 0, 'origin': None})
+        self.assertEqual(profile.duplicates(), [('SELECT %s', 2)])
+
+    def test_histogram(self):
+        """Корзины гистограммы накопительные, последняя — +Inf."""
+        histogram = Histogram((1, 5))
+        for value in (0.5, 3, 10):
+            histogram.observe(value)
+        lines = list(histogram.lines('x', 'view="v"'))
+        self.assertEqual(lines[:3], [
+            'x_bucket{view="v",le="1"} 1',
+            'x_bucket{view="v",le="5"} 2',
+            'x_bucket{view="v",le="+Inf"} 3',
+        ])
+
+
+class MetricsDisabledTests(TestCase):
+    def test_no_route(self):
+        """Без профилирования маршрута /metrics нет."""
+        with self.assertRaises(NoReverseMatch):
+            reverse('metrics')
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
@@ -0,0 +1,33 @@
+from unittest import mock
+
+from django.template import engines
+from django.test import TestCase, override_settings
+
+from core import templates
+from core.benchmark import template_settings
+from core.templates import warm_up, warm_up_on_startup
+
+
+class TemplateWarmUpTests(TestCase):
+    @override_settings(TEMPLATES=template_settings(cached=True))
+    def test_templates_compiled(self):
+        """После прогрева шаблоны и их include лежат в кеше загрузчика."""
+        loader, = engines['django'].engine.template_loaders
+        self.assertGreater(warm_up(), 0)
+        for name in ('posts/index.html', 'posts/includes/paginator.html',
+                     'posts/includes/switcher.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, loader.get_template_cache)
+
+    @override_settings(TEMPLATE_WARMUP=False)
+    def test_startup_disabled(self):
+        """Без TEMPLATE_WARMUP сервер стартует без прогрева."""
+        with mock.patch.object(templates, 'warm_up') as warm:
+            warm_up_on_startup()
+        warm.assert_not_called()
+
+    @override_settings(TEMPLATE_WARMUP=True)
+    def test_startup_enabled(self):
+        with mock.patch.object(templates, 'warm_up') as warm:
+            warm_up_on_startup()
+        warm.assert_called_once_with()
@@ -1,6 +1,103 @@
+from math import ceil
+
 from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 
+from . import feed_cache, search
 from .models import Group, Post, Comment, Follow
+from .utils import (KEYSET_ORDERING, CursorPaginator, bounded_count,
+                    encode_cursor)
+
+# Сколько самых релевантных постов показывает поиск в админке.
+ADMIN_SEARCH_LIMIT = 1000
+CURSOR_VAR = 'cursor'
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, который не считает строки дальше count_limit.
+
+    Если строк больше, для списка без фильтров берётся оценка из
+    статистики базы, а для отфильтрованного — сам count_limit. Номера
+    страниц выдаются только в пределах count_limit.
+    """
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        count, _, _ = bounded_count(self.object_list, self.count_limit)
+        return count
+
+    @cached_property
+    def num_pages(self):
+        count = min(self.count, self.count_limit)
+        if count == 0 and not self.allow_empty_first_page:
+            return 0
+        return ceil(max(1, count - self.orphans) / self.per_page)
+
+
+class PostChangeList(ChangeList):
+    """Список постов с переходом на keyset-пагинацию (?cursor=).
+
+    Номера страниц работают в пределах посчитанных строк, дальше список
+    листается курсором по (pub_date, id) без OFFSET.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        self.cursor_mode = False
+        self.next_url = self.previous_url = None
+        self.first_url = self.get_query_string(
+            remove=[CURSOR_VAR, PAGE_VAR])
+        # ChangeList дописывает к сортировке сортировку queryset админки.
+        ordering = tuple(dict.fromkeys(self.queryset.query.order_by))
+        keyset = ordering == KEYSET_ORDERING
+        cursor = request.GET.get(CURSOR_VAR)
+        if cursor is None or not keyset:
+            super().get_results(request)
+            if keyset and self.multi_page and not self.show_all:
+                self.link_last_page()
+            return
+        paginator = CursorPaginator(
+            self.queryset.select_related(None).only('pk', 'pub_date'),
+            self.list_per_page,
+        )
+        page = paginator.cursor_page(cursor)
+        self.result_list = self.queryset.filter(
+            pk__in=[post.pk for post in page])
+        self.result_count = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page).count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = True
+        self.paginator = paginator
+        self.cursor_mode = True
+        self.next_url = self.cursor_url(page.next_cursor)
+        self.previous_url = self.cursor_url(page.previous_cursor)
+
+    def link_last_page(self):
+        """С последней пронумерованной страницы листаем курсором."""
+        paginator = self.paginator
+        if (paginator.count < paginator.count_limit
+                or self.page_num + 1 < paginator.num_pages):
+            return
+        # result_list всё равно будет прочитан: запрос не повторится.
+        rows = list(self.result_list)
+        if rows:
+            self.next_url = self.cursor_url(encode_cursor(rows[-1], 'n'))
+
+    def cursor_url(self, cursor):
+        if cursor is None:
+            return None
+        return self.get_query_string({CURSOR_VAR: cursor}, [PAGE_VAR])
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -13,10 +110,42 @@ class PostAdmin(admin.ModelAdmin):
     )
 
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    ordering = KEYSET_ORDERING
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def get_changelist(self, request, **kwargs):
+        return PostChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по индексу вместо LIKE '%...%' по всей таблице."""
+        if not search_term:
+            return queryset, False
+        ids = search.get_backend().search(
+            search_term, 0, ADMIN_SEARCH_LIMIT)
+        return queryset.filter(pk__in=ids), False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'group':
+            # Один список групп на все строки, а не запрос на каждую.
+            field.choices = self.group_choices(field)
+        return field
+
+    def group_choices(self, field):
+        version, = feed_cache.get_versions(['relations'])
+        key = f'admin-group-choices:{version}'
+        choices = cache.get(key)
+        if choices is None:
+            choices = list(field.choices)
+            cache.set(key, choices)
+        return choices
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
@@ -0,0 +1,319 @@
+"""Потоковый импорт и экспорт постов, комментариев, групп и подписок.
+
+Записи идут цепочкой генераторов: чтение файла -> пачки -> bulk_create
+(или iterator() -> запись в файл), поэтому память не зависит от объёма.
+Пользователи и группы в файлах указываются по username и slug, посты,
+комментарии и подписки сохраняют свои id. Формат — NDJSON или CSV.
+"""
+import csv
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import feed_cache, search, timeline
+from .models import Comment, Follow, Group, Post, Profile
+
+User = get_user_model()
+
+FORMATS = ('ndjson', 'csv')
+MODELS = {
+    'groups': Group,
+    'posts': Post,
+    'comments': Comment,
+    'follows': Follow,
+}
+# Колонка файла -> поле для values_list().
+COLUMNS = {
+    'groups': {
+        'id': 'id',
+        'title': 'title',
+        'slug': 'slug',
+        'description': 'description',
+    },
+    'posts': {
+        'id': 'id',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'pub_date': 'pub_date',
+        'text': 'text',
+        'image': 'image',
+    },
+    'comments': {
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'pub_date': 'pub_date',
+        'text': 'text',
+    },
+    'follows': {
+        'id': 'id',
+        'user': 'user__username',
+        'author': 'author__username',
+    },
+}
+# keep_pub_date меняет поля модели для всего процесса.
+pub_date_lock = threading.Lock()
+USER_COLUMNS = {
+    'posts': ('author',),
+    'comments': ('author',),
+    'follows': ('user', 'author'),
+}
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def guess_format(path):
+    return 'csv' if path.endswith('.csv') else 'ndjson'
+
+
+def export_rows(kind, after_id=0, chunk_size=2000):
+    """Записи по возрастанию id, начиная после after_id."""
+    columns = COLUMNS[kind]
+    rows = MODELS[kind].objects.filter(pk__gt=after_id).order_by(
+        'pk').values_list(*columns.values())
+    for values in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(columns, values))
+
+
+def encode(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def write_rows(rows, stream, fmt, columns, header=True):
+    """Пишет записи в поток и отдаёт их дальше по цепочке."""
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=columns)
+        if header:
+            writer.writeheader()
+        for row in rows:
+            writer.writerow({
+                name: '' if value is None else encode(value)
+                for name, value in row.items()
+            })
+            yield row
+        return
+    for row in rows:
+        stream.write(json.dumps(
+            {name: encode(value) for name, value in row.items()},
+            ensure_ascii=False,
+        ) + '\n')
+        yield row
+
+
+def truncate(path, offset=None):
+    """Обрезает файл выгрузки до offset или до последней полной строки.
+
+    Прерванная выгрузка могла записать часть пачки после контрольной
+    точки; без обрезки эти записи при продолжении повторились бы.
+    """
+    if offset is None:
+        offset = last_line_end(path)
+    os.truncate(path, offset)
+
+
+def last_line_end(path, block_size=64 * 1024):
+    """Позиция после последнего перевода строки; файл читается с конца."""
+    with open(path, 'rb') as stream:
+        end = stream.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(0, end - block_size)
+            stream.seek(start)
+            position = stream.read(end - start).rfind(b'\n')
+            if position != -1:
+                return start + position + 1
+            end = start
+    return 0
+
+
+def read_rows(stream, fmt):
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield {name: value or None for name, value in row.items()}
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def user_ids(usernames):
+    """id пользователей по username; недостающие создаются без пароля."""
+    usernames = set(usernames)
+    ids = dict(User.objects.filter(
+        username__in=usernames).values_list('username', 'id'))
+    missing = usernames - set(ids)
+    if missing:
+        User.objects.bulk_create(
+            User(username=username, password='!') for username in missing)
+        created = dict(User.objects.filter(
+            username__in=missing).values_list('username', 'id'))
+        # bulk_create не шлёт post_save: профили создаются здесь же.
+        Profile.objects.bulk_create(
+            (Profile(user_id=user_id) for user_id in created.values()),
+            ignore_conflicts=True)
+        ids.update(created)
+    return ids
+
+
+def pub_date(value):
+    return parse_datetime(value) if value else timezone.now()
+
+
+def build(kind, rows):
+    """Объекты моделей для пачки записей; невалидные записи пропускаются."""
+    users = user_ids(
+        row[column] for row in rows for column in USER_COLUMNS.get(kind, ())
+    )
+    if kind == 'groups':
+        return [Group(id=row['id'], title=row['title'], slug=row['slug'],
+                      description=row.get('description') or '')
+                for row in rows]
+    if kind == 'posts':
+        groups = dict(Group.objects.filter(
+            slug__in={row['group'] for row in rows if row.get('group')},
+        ).values_list('slug', 'id'))
+        return [Post(id=row['id'], author_id=users[row['author']],
+                     group_id=groups.get(row.get('group')),
+                     pub_date=pub_date(row.get('pub_date')),
+                     text=row['text'], image=row.get('image') or '')
+                for row in rows]
+    if kind == 'comments':
+        posts = set(Post.objects.filter(
+            pk__in={row['post'] for row in rows}).values_list('pk', flat=True))
+        return [Comment(id=row['id'], post_id=int(row['post']),
+                        author_id=users[row['author']],
+                        pub_date=pub_date(row.get('pub_date')),
+                        text=row['text'])
+                for row in rows if int(row['post']) in posts]
+    return [Follow(id=row['id'], user_id=users[row['user']],
+                   author_id=users[row['author']])
+            for row in rows if row['user'] != row['author']]
+
+
+@contextmanager
+def keep_pub_date(model):
+    """Отключает auto_now_add, чтобы сохранить дату из файла.
+
+    Поле общее для процесса, поэтому вызовы идут по одному, а прежние
+    значения восстанавливаются даже при ошибке.
+    """
+    with pub_date_lock:
+        fields = {field: field.auto_now_add for field in model._meta.fields
+                  if getattr(field, 'auto_now_add', False)}
+        for field in fields:
+            field.auto_now_add = False
+        try:
+            yield
+        finally:
+            for field, auto_now_add in fields.items():
+                field.auto_now_add = auto_now_add
+
+
+def after_import(kind, objects):
+    """То, что обычно делают сигналы: bulk_create их не отправляет."""
+    feeds = {'relations'}
+    if kind == 'posts':
+        search.get_backend().index(objects)
+        feeds.add('index')
+        timeline.fan_out_many(objects)
+        for post in objects:
+            feeds.add(f'author:{post.author_id}')
+            if post.group_id:
+                feeds.add(f'group:{post.group_id}')
+    elif kind == 'comments':
+        feeds.update(f'post:{comment.post_id}' for comment in objects)
+    elif kind == 'follows':
+        timeline.backfill_many(objects)
+        for follow in objects:
+            feeds.update((f'profile:{follow.user_id}',
+                          f'profile:{follow.author_id}'))
+    feed_cache.bump(*feeds)
+
+
+def import_rows(kind, rows, batch_size):
+    """Сохраняет записи пачками и отдаёт (прочитано, сохранено) по каждой.
+
+    Уже существующие записи пропускаются, поэтому пачку, прерванную до
+    записи контрольной точки, можно безопасно загрузить ещё раз.
+    """
+    model = MODELS[kind]
+    for batch in batched(rows, batch_size):
+        objects = build(kind, batch)
+        with transaction.atomic(), keep_pub_date(model):
+            model.objects.bulk_create(objects, ignore_conflicts=True)
+            after_import(kind, objects)
+        yield len(batch), len(objects)
+
+
+def reset_sequences(kind):
+    """Сдвигает счётчики id после вставки записей с явными id."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [MODELS[kind]])
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+class Checkpoint:
+    """Контрольная точка в JSON-файле; пишется атомарной заменой."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not (self.path and os.path.exists(self.path)):
+            return {}
+        with open(self.path) as stream:
+            return json.load(stream)
+
+    def save(self, **state):
+        if not self.path:
+            return
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as stream:
+            json.dump(state, stream)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Progress:
+    """Счётчик записей со скоростью в строках в секунду."""
+
+    def __init__(self, done=0):
+        self.start = time.monotonic()
+        self.done = done
+        self.counted = 0
+
+    def add(self, rows):
+        self.done += rows
+        self.counted += rows
+
+    @property
+    def rate(self):
+        elapsed = time.monotonic() - self.start
+        return self.counted / elapsed if elapsed else 0.0
+
+    def __str__(self):
+        return f'{self.done} строк, {self.rate:.0f} строк/с'
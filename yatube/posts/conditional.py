@@ -0,0 +1,103 @@
+"""Условные GET-запросы (ETag и Last-Modified) для лент и страницы поста.
+
+Валидаторы строятся по версиям лент из кеша (feed_cache.get_state), а не
+по самим постам: для проверки хватает одного get_many и, для групп,
+профилей и постов, поиска строки по ключу. Неизменившаяся страница
+отдаётся ответом 304 без выполнения view.
+
+Страница вошедшего пользователя содержит его имя, кнопки подписки и
+форму с CSRF-токеном, поэтому в ETag входят id пользователя и его
+CSRF-cookie, а ответ помечается Cache-Control: private. Страницы гостей
+одинаковы для всех и могут храниться общими кешами; Vary: Cookie
+разделяет гостей и вошедших пользователей.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers, quote_etag)
+from django.utils.http import http_date
+
+from . import feed_cache
+from .models import Group, Post, User
+
+
+def index_feeds(request):
+    return ['index', 'relations']
+
+
+def group_feeds(request, slug):
+    group_id = Group.objects.filter(
+        slug=slug).values_list('pk', flat=True).first()
+    if group_id is None:
+        return None
+    return [f'group:{group_id}', 'relations']
+
+
+def profile_feeds(request, username):
+    author_id = User.objects.filter(
+        username=username).values_list('pk', flat=True).first()
+    if author_id is None:
+        return None
+    return [f'author:{author_id}', f'profile:{author_id}', 'relations']
+
+
+def post_feeds(request, post_id):
+    author_id = Post.objects.filter(
+        pk=post_id).values_list('author_id', flat=True).first()
+    if author_id is None:
+        return None
+    return [f'post:{post_id}', f'author:{author_id}', 'relations']
+
+
+def user_part(request):
+    user = request.user
+    if not user.is_authenticated:
+        return ''
+    return f'{user.pk}:{request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")}'
+
+
+def validators(request, feeds):
+    """ETag и время Last-Modified страницы по версиям её лент."""
+    versions, modified = feed_cache.get_state(feeds)
+    parts = [request.get_full_path(), user_part(request), *map(str, versions)]
+    etag = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    return quote_etag(etag), int(modified)
+
+
+def set_validators(request, response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    patch_vary_headers(response, ['Cookie'])
+
+
+def conditional(feeds_func):
+    """Условный GET для view, страница которой зависит от лент feeds_func.
+
+    feeds_func(request, *args, **kwargs) возвращает список лент или None,
+    если объекта нет: тогда ответ (404) отдаёт сам view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            feeds = feeds_func(request, *args, **kwargs)
+            if feeds is None:
+                return view(request, *args, **kwargs)
+            etag, last_modified = validators(request, feeds)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            set_validators(request, response, etag, last_modified)
+            return response
+        return inner
+    return decorator
@@ -0,0 +1,106 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарными UPDATE ... SET n = n + 1 из сигналов, в той же
+транзакции, что и сама запись. rebuild() пересчитывает их с нуля, если
+значения разошлись (команда rebuild_counters).
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, Profile
+
+User = get_user_model()
+
+
+def change(queryset, field, delta):
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def change_profile(user_id, field, delta):
+    profiles = Profile.objects.filter(user_id=user_id)
+    if change(profiles, field, delta) or delta < 0:
+        return
+    # Профиля ещё нет: создаём и считаем его счётчики целиком.
+    Profile.objects.get_or_create(user_id=user_id)
+    rebuild_profiles(profiles)
+
+
+def change_group(group_id, delta):
+    if group_id:
+        change(Group.objects.filter(pk=group_id), 'posts_count', delta)
+
+
+def post_created(post):
+    change_profile(post.author_id, 'posts_count', 1)
+    change_group(post.group_id, 1)
+
+
+def post_deleted(post):
+    change_profile(post.author_id, 'posts_count', -1)
+    change_group(post.group_id, -1)
+
+
+def post_group_changed(old_group_id, new_group_id):
+    change_group(old_group_id, -1)
+    change_group(new_group_id, 1)
+
+
+def comment_changed(comment, delta):
+    change(Post.objects.filter(pk=comment.post_id), 'comments_count', delta)
+
+
+def follow_changed(follow, delta):
+    change_profile(follow.author_id, 'followers_count', delta)
+    change_profile(follow.user_id, 'following_count', delta)
+
+
+def count_of(model, field, outer='pk'):
+    rows = model.objects.filter(**{field: OuterRef(outer)}).order_by()
+    return Coalesce(
+        Subquery(rows.values(field).annotate(n=Count('pk')).values('n')),
+        0,
+    )
+
+
+def rebuild_profiles(profiles):
+    return profiles.update(
+        posts_count=count_of(Post, 'author', 'user'),
+        followers_count=count_of(Follow, 'author', 'user'),
+        following_count=count_of(Follow, 'user', 'user'),
+    )
+
+
+def get_profile(user):
+    """Профиль user со счётчиками.
+
+    Пользователи, созданные через bulk_create (import_content), остаются
+    без профиля до rebuild(): такой профиль создаётся и считается здесь.
+    """
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        profile, created = Profile.objects.get_or_create(user=user)
+        if created:
+            rebuild_profiles(Profile.objects.filter(pk=profile.pk))
+            profile.refresh_from_db()
+        user.profile = profile
+        return profile
+
+
+def rebuild():
+    """Пересчитывает все счётчики, возвращает число обновлённых строк."""
+    Profile.objects.bulk_create(
+        Profile(user_id=user_id)
+        for user_id in User.objects.filter(
+            profile__isnull=True).values_list('id', flat=True)
+    )
+    return {
+        'profiles': rebuild_profiles(Profile.objects.all()),
+        'groups': Group.objects.update(
+            posts_count=count_of(Post, 'group')),
+        'posts': Post.objects.update(
+            comments_count=count_of(Comment, 'post')),
+    }
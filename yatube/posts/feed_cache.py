@@ -0,0 +1,157 @@
+"""Кеш страниц лент с инвалидацией по событиям.
+
+Ключ страницы содержит версию ленты ('index', 'group:<id>', 'author:<id>')
+и общую версию 'relations' для групп и авторов, выводимых в постах.
+Сигналы моделей увеличивают версии, поэтому записи живут долго
+(FEED_CACHE_TIMEOUT) и при этом не устаревают. От одновременного пересчёта
+защищают ранний вероятностный пересчёт (XFetch) и блокировка на пересчёт
+истёкшей записи.
+
+Рядом с версией хранится время последнего изменения ленты: по версиям и
+времени строятся ETag и Last-Modified страниц (posts.conditional).
+"""
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core import db
+from posts.utils import (PAGE_NUMBER_LIMIT, PAGINATE_BY, CountedPaginator,
+                         paginate)
+
+# Чем больше BETA, тем раньше до истечения запись пересчитывается.
+XFETCH_BETA = 1.0
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 0.05
+
+
+def version_key(feed):
+    return f'feed-version:{feed}'
+
+
+def modified_key(feed):
+    return f'feed-modified:{feed}'
+
+
+def get_state(feeds):
+    """Версии лент и время последнего изменения любой из них."""
+    version_keys = [version_key(feed) for feed in feeds]
+    modified_keys = [modified_key(feed) for feed in feeds]
+    values = cache.get_many(version_keys + modified_keys)
+    now = time.time()
+    for key in version_keys + modified_keys:
+        if key not in values:
+            # Начальная версия от времени: после вытеснения ключа версии
+            # старые записи не всплывут снова.
+            initial = int(now * 1000) if key in version_keys else now
+            cache.add(key, initial, None)
+            values[key] = cache.get(key, initial)
+    versions = [values[key] for key in version_keys]
+    return versions, max(values[key] for key in modified_keys)
+
+
+def get_versions(feeds):
+    return get_state(feeds)[0]
+
+
+def bump(*feeds):
+    for feed in feeds:
+        try:
+            cache.incr(version_key(feed))
+        except ValueError:
+            cache.set(version_key(feed), int(time.time() * 1000), None)
+    now = time.time()
+    cache.set_many({modified_key(feed): now for feed in feeds}, None)
+
+
+def store(key, compute, timeout):
+    start = time.time()
+    value = compute()
+    delta = time.time() - start
+    cache.set(key, (value, delta, time.time() + timeout), timeout)
+    return value
+
+
+def get_or_compute(key, compute, timeout=None, fresh=False):
+    """Значение из кеша или compute() с защитой от «стада» пересчётов.
+
+    Истёкшую запись пересчитывает тот, кто взял блокировку, остальные
+    отдают прежнее значение. Если записи нет совсем, остальные ждут её до
+    LOCK_TIMEOUT, а не пересчитывают сами. При fresh значение
+    пересчитывается без блокировки и перезаписывается.
+    """
+    timeout = timeout or settings.FEED_CACHE_TIMEOUT
+    if fresh:
+        return store(key, compute, timeout)
+    lock_key = f'{key}:lock'
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expiry = entry
+        early = delta * XFETCH_BETA * math.log(1 - random.random())
+        if time.time() - early < expiry:
+            return value
+    locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    if entry is not None and not locked:
+        return value
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while not locked and time.monotonic() < deadline:
+        time.sleep(LOCK_WAIT)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        # Блокировка истекла или её держатель упал: пересчёт за нами.
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    try:
+        return store(key, compute, timeout)
+    finally:
+        # Чужую блокировку не снимаем: иначе пересчёт начнут и другие.
+        if locked:
+            cache.delete(lock_key)
+
+
+def page(request, post_list, feed, count=None, many_pages=False):
+    """paginate() с кешированием страниц ленты feed.
+
+    count — число постов ленты из счётчика. many_pages — без счётчика:
+    строки считаются только до PAGE_NUMBER_LIMIT страниц, дальше число
+    оценивается (см. CountedPaginator).
+    """
+    if 'cursor' in request.GET:
+        return paginate(request, post_list)
+    page_number = request.GET.get('page', '1')
+    if not page_number.isdigit():
+        page_number = '1'
+    if many_pages and int(page_number) > PAGE_NUMBER_LIMIT:
+        # За пронумерованными страницами — курсор, его страницы не кешируются.
+        return paginate(request, post_list, many_pages=True)
+    versions = get_versions((feed, 'relations'))
+    key = 'feed-page:{}:{}:{}'.format(
+        feed, '.'.join(map(str, versions)), page_number)
+
+    def compute():
+        page_obj = paginate(request, post_list, count=count,
+                            many_pages=many_pages)
+        paginator = page_obj.paginator
+        return (
+            page_obj.number,
+            list(page_obj.object_list),
+            (paginator.count, paginator.approximate, paginator.lower_bound),
+            page_obj.next_cursor,
+        )
+
+    # Реплика может отставать: прочитанное с неё живёт в кеше недолго, а
+    # закреплённый за основной базой запрос пишет в кеш свежую страницу.
+    timeout = settings.REPLICA_PIN_SECONDS if db.reading_replica() else None
+    number, object_list, total, next_cursor = get_or_compute(
+        key, compute, timeout, fresh=db.pinned())
+    total, approximate, lower_bound = total
+    paginator = CountedPaginator(post_list, PAGINATE_BY, count=total)
+    paginator.approximate = approximate
+    paginator.lower_bound = lower_bound
+    page_obj = paginator.page(number)
+    page_obj.object_list = object_list
+    page_obj.cursor_mode = False
+    page_obj.next_cursor = next_cursor
+    return page_obj
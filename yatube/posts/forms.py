@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from . import uploads
 from .models import Group, Post, Comment
 
 
@@ -18,6 +20,24 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Прерванную загрузку не отдаём полю: оно сочло бы её битой
+        # картинкой, а нужна ошибка о размере.
+        self.oversized = isinstance(self.files.get('image'),
+                                    uploads.OversizedUpload)
+        if self.oversized:
+            self.files = self.files.copy()
+            del self.files['image']
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if self.oversized:
+            raise uploads.size_error()
+        if isinstance(image, UploadedFile):
+            return uploads.sanitize(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
 
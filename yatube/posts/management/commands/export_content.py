@@ -0,0 +1,51 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts import bulk
+
+
+class Command(BaseCommand):
+    help = ('Выгружает группы, посты, комментарии или подписки '
+            'в NDJSON или CSV.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=bulk.MODELS)
+        parser.add_argument('path', help="Файл или '-' для stdout.")
+        parser.add_argument('--format', choices=bulk.FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки: продолжить прерванную выгрузку.',
+        )
+
+    def handle(self, *args, **options):
+        kind, path = options['kind'], options['path']
+        fmt = options['format'] or bulk.guess_format(path)
+        checkpoint = bulk.Checkpoint(options['checkpoint'])
+        state = checkpoint.load()
+        resumed = bool(state)
+        progress = bulk.Progress(state.get('rows', 0))
+        log = self.stderr if path == '-' else self.stdout
+        rows = bulk.export_rows(
+            kind, state.get('last_id', 0), options['chunk_size'])
+        if resumed and path != '-':
+            bulk.truncate(path, state.get('offset'))
+        stream = sys.stdout if path == '-' else open(
+            path, 'a' if resumed else 'w', newline='', encoding='utf-8')
+        try:
+            rows = bulk.write_rows(rows, stream, fmt, bulk.COLUMNS[kind],
+                                   header=not resumed)
+            for chunk in bulk.batched(rows, options['chunk_size']):
+                stream.flush()
+                progress.add(len(chunk))
+                checkpoint.save(
+                    last_id=chunk[-1]['id'], rows=progress.done,
+                    offset=None if path == '-' else stream.tell(),
+                )
+                log.write(f'{kind}: {progress}')
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        checkpoint.clear()
+        log.write(self.style.SUCCESS(f'Выгружено {kind}: {progress}'))
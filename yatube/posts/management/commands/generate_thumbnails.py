@@ -0,0 +1,35 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+CHUNK_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для картинок всех постов, по процессу на ядро.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').values_list(
+            'image', flat=True).iterator(chunk_size=CHUNK_SIZE)
+        if options['workers'] == 1:
+            results = map(thumbnails.generate, names)
+            done = sum(results)
+        else:
+            names = list(names)
+            # Дочерние процессы не должны делить соединение с родителем.
+            connections.close_all()
+            with ProcessPoolExecutor(options['workers']) as executor:
+                done = sum(executor.map(
+                    thumbnails.generate_in_worker, names,
+                    chunksize=CHUNK_SIZE,
+                ))
+        self.stdout.write(self.style.SUCCESS(f'Миниатюр готово: {done}'))
@@ -0,0 +1,50 @@
+import itertools
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts import bulk, counters, feed_cache
+
+
+class Command(BaseCommand):
+    help = ('Загружает группы, посты, комментарии или подписки '
+            'из NDJSON или CSV пачками через bulk_create.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=bulk.MODELS)
+        parser.add_argument('path', help="Файл или '-' для stdin.")
+        parser.add_argument('--format', choices=bulk.FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки: продолжить прерванную загрузку.',
+        )
+
+    def handle(self, *args, **options):
+        kind, path = options['kind'], options['path']
+        fmt = options['format'] or bulk.guess_format(path)
+        checkpoint = bulk.Checkpoint(options['checkpoint'])
+        skip = checkpoint.load().get('rows', 0)
+        progress = bulk.Progress(skip)
+        saved = 0
+        stream = sys.stdin if path == '-' else open(
+            path, newline='', encoding='utf-8')
+        try:
+            rows = itertools.islice(bulk.read_rows(stream, fmt), skip, None)
+            for read, created in bulk.import_rows(
+                kind, rows, options['batch_size']
+            ):
+                progress.add(read)
+                saved += created
+                checkpoint.save(rows=progress.done)
+                self.stdout.write(f'{kind}: {progress}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        bulk.reset_sequences(kind)
+        counters.rebuild()
+        # Пересчитанные счётчики выводятся на страницах всех лент.
+        feed_cache.bump('relations')
+        checkpoint.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {kind}: {progress}, записей к сохранению: {saved}'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Строит поисковый индекс постов заново.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = search.get_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Поисковый индекс построен: {indexed} постов'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Заполняет ленты подписок заново по подпискам и постам.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            entries = timeline.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Ленты подписок заполнены: {entries} записей'))
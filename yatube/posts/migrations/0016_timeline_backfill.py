@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def fill_timelines(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    Timeline = apps.get_model('posts', 'Timeline')
+    follows = Follow.objects.exclude(
+        author__profile__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT)
+    for follow in follows.iterator():
+        posts = Post.objects.filter(author_id=follow.author_id).order_by(
+            '-pub_date', '-id').values_list('id', 'pub_date')
+        Timeline.objects.bulk_create(
+            (
+                Timeline(user_id=follow.user_id, author_id=follow.author_id,
+                         post_id=post_id, pub_date=pub_date)
+                for post_id, pub_date
+                in posts[:settings.TIMELINE_BACKFILL_SIZE]
+            ),
+            batch_size=settings.TIMELINE_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
-from core.models import CreatedModel
+from core.models import CreatedModel, UpdatedModel
 
 
 User = get_user_model()
@@ -11,12 +11,23 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True, null=True, max_length=200)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
 
     def __str__(self):
         return self.title
 
 
-class Post(CreatedModel, models.Model):
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты со всем, что выводится в карточке ленты, одним запросом."""
+        return self.select_related('author', 'group').only(
+            'text', 'pub_date', 'updated', 'image',
+            'author__username', 'author__first_name', 'author__last_name',
+            'group__slug', 'group__title',
+        )
+
+
+class Post(CreatedModel, UpdatedModel, models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Введите текст поста',
@@ -41,14 +52,40 @@ class Post(CreatedModel, models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date', )
+        indexes = [
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_pub_date_id_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text
 
 
+class CommentQuerySet(models.QuerySet):
+    def with_author(self):
+        return self.select_related('author').only(
+            'text', 'pub_date', 'post_id', 'author__username')
+
+
 class Comment(CreatedModel, models.Model):
     author = models.ForeignKey(
         User,
@@ -67,8 +104,16 @@ class Comment(CreatedModel, models.Model):
         verbose_name='Текст комментария',
     )
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ('pub_date',)
+        indexes = [
+            models.Index(
+                fields=('post', 'pub_date', 'id'),
+                name='comment_post_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -99,8 +144,76 @@ class Follow(models.Model):
                 name='Нельзя подписываться на себя',
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('author', 'user'),
+                name='follow_author_user_idx',
+            ),
+        ]
 
     def __str__(self):
         return(
             f'{self.user.username} подписан на {self.author.username}'
         )
+
+
+class Profile(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='profile',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField(
+        'Число подписок',
+        default=0,
+    )
+
+    def __str__(self):
+        return f'Профиль {self.user_id}'
+
+
+class Timeline(models.Model):
+    """Материализованная лента подписок: по строке на пост и подписчика."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField('Дата создания поста')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='Пост попадает в ленту один раз',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_pub_date_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} в ленте {self.user_id}'
@@ -0,0 +1,238 @@
+"""Полнотекстовый поиск по постам.
+
+Текст поста разбивается на слова, слова приводятся к основе стеммером
+Snowball для русского языка, и основы кладутся в индекс. Индекс
+обновляется сигналами при сохранении и удалении поста, а целиком
+строится заново командой rebuild_search_index. Хранилище индекса
+подключается через SEARCH_BACKEND: SqliteFtsBackend держит его в
+виртуальной таблице FTS5, DatabaseBackend ищет прямо в posts_post и
+годится для баз без FTS. Без SEARCH_BACKEND хранилище выбирается по
+базе (VENDOR_BACKENDS).
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+SEARCH_TABLE = 'posts_search'
+# Хранилище индекса по умолчанию для базы; для остальных — DatabaseBackend.
+VENDOR_BACKENDS = {'sqlite': 'posts.search.SqliteFtsBackend'}
+DEFAULT_BACKEND = 'posts.search.DatabaseBackend'
+REBUILD_BATCH_SIZE = 1000
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-яё]')
+
+VOWELS = 'аеиоуыэюя'
+PERFECTIVE_GERUND_RE = re.compile(
+    '((?<=[ая])(в|вши|вшись)|(ив|ивши|ившись|ыв|ывши|ывшись))$')
+REFLEXIVE_RE = re.compile('(ся|сь)$')
+ADJECTIVAL_RE = re.compile(
+    '((?<=[ая])(ем|нн|вш|ющ|щ)|ивш|ывш|ующ)?'
+    '(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых'
+    '|ую|юю|ая|яя|ою|ею)$')
+VERB_RE = re.compile(
+    '((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)'
+    '|(ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено'
+    '|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю))$')
+NOUN_RE = re.compile(
+    '(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем'
+    '|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$')
+DERIVATIONAL_RE = re.compile('ость?$')
+SUPERLATIVE_RE = re.compile('ейше?$')
+
+
+def region_start(word, start=0):
+    """Начало области после первого сочетания «гласная + согласная»."""
+    for i in range(start + 1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def stem(word):
+    """Основа русского слова по алгоритму Snowball."""
+    word = word.replace('ё', 'е')
+    rv_start = next(
+        (i + 1 for i, letter in enumerate(word) if letter in VOWELS),
+        len(word),
+    )
+    r2_start = region_start(word, region_start(word))
+    prefix, rv = word[:rv_start], word[rv_start:]
+
+    rv, found = PERFECTIVE_GERUND_RE.subn('', rv)
+    if not found:
+        rv = REFLEXIVE_RE.sub('', rv)
+        for pattern in (ADJECTIVAL_RE, VERB_RE, NOUN_RE):
+            rv, found = pattern.subn('', rv)
+            if found:
+                break
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    match = DERIVATIONAL_RE.search(rv)
+    if match and rv_start + match.start() >= r2_start:
+        rv = rv[:match.start()]
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    else:
+        rv, found = SUPERLATIVE_RE.subn('', rv)
+        if found and rv.endswith('нн'):
+            rv = rv[:-1]
+        elif not found and rv.endswith('ь'):
+            rv = rv[:-1]
+    return prefix + rv
+
+
+def terms(text):
+    """Поисковые термины текста: основы русских слов и прочие слова."""
+    for word in WORD_RE.findall(text.lower()):
+        yield stem(word) if CYRILLIC_RE.search(word) else word
+
+
+def document(text):
+    return ' '.join(terms(text))
+
+
+class SearchBackend:
+    """Интерфейс хранилища поискового индекса."""
+
+    def index(self, posts):
+        """Добавляет или обновляет посты в индексе."""
+        raise NotImplementedError
+
+    def remove(self, post_ids):
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Строит индекс заново по всем постам; отдаёт их число."""
+        raise NotImplementedError
+
+    def count(self, query):
+        raise NotImplementedError
+
+    def search(self, query, offset, limit):
+        """id найденных постов, самые релевантные первыми."""
+        raise NotImplementedError
+
+
+class DatabaseBackend(SearchBackend):
+    """Поиск без индекса: все основы должны встречаться в тексте."""
+
+    def index(self, posts):
+        pass
+
+    def remove(self, post_ids):
+        pass
+
+    def rebuild(self):
+        return Post.objects.count()
+
+    def queryset(self, query):
+        condition = Q()
+        for term in set(terms(query)):
+            condition &= Q(text__icontains=term)
+        return Post.objects.filter(condition)
+
+    def count(self, query):
+        return self.queryset(query).count()
+
+    def search(self, query, offset, limit):
+        return list(self.queryset(query).values_list(
+            'id', flat=True)[offset:offset + limit])
+
+
+class SqliteFtsBackend(SearchBackend):
+    """Индекс в виртуальной таблице FTS5, ранжирование по BM25."""
+
+    def index(self, posts):
+        rows = [(post.pk, document(post.text)) for post in posts]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+                [(pk,) for pk, _ in rows],
+            )
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, terms) VALUES (%s, %s)',
+                rows,
+            )
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+                [(pk,) for pk in post_ids],
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        posts = Post.objects.order_by().only('id', 'text')
+        batch = []
+        done = 0
+        for post in posts.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            batch.append(post)
+            if len(batch) == REBUILD_BATCH_SIZE:
+                self.index(batch)
+                done += len(batch)
+                batch = []
+        self.index(batch)
+        return done + len(batch)
+
+    def match(self, query):
+        """Выражение MATCH: все термины запроса, каждый в кавычках."""
+        return ' '.join(
+            '"{}"'.format(term.replace('"', '""'))
+            for term in dict.fromkeys(terms(query))
+        )
+
+    def count(self, query):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {SEARCH_TABLE} '
+                f'WHERE {SEARCH_TABLE} MATCH %s',
+                [self.match(query)],
+            )
+            return cursor.fetchone()[0]
+
+    def search(self, query, offset, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {SEARCH_TABLE} '
+                f'WHERE {SEARCH_TABLE} MATCH %s '
+                f'ORDER BY rank, rowid DESC LIMIT %s OFFSET %s',
+                [self.match(query), limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+@lru_cache(maxsize=None)
+def get_backend(path=None):
+    path = path or settings.SEARCH_BACKEND or VENDOR_BACKENDS.get(
+        connection.vendor, DEFAULT_BACKEND)
+    return import_string(path)()
+
+
+class SearchResults:
+    """Результаты поиска для Paginator: считаются и читаются по срезам."""
+
+    def __init__(self, query, backend=None):
+        self.query = query
+        self.backend = backend or get_backend()
+        self.empty = not any(terms(query))
+
+    def count(self):
+        if self.empty:
+            return 0
+        return self.backend.count(self.query)
+
+    def __getitem__(self, page):
+        if self.empty:
+            return []
+        ids = self.backend.search(
+            self.query, page.start, page.stop - page.start)
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,160 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import counters, feed_cache, search, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, Profile
+
+User = get_user_model()
+
+# Поля, которые выводятся в карточке поста.
+CARD_USER_FIELDS = ('username', 'first_name', 'last_name')
+CARD_GROUP_FIELDS = ('slug', 'title')
+
+
+def invalidate_feeds(*feeds):
+    # Второй раз — после коммита, чтобы не закешировать страницу,
+    # прочитанную параллельным запросом до фиксации транзакции.
+    feed_cache.bump(*feeds)
+    transaction.on_commit(lambda: feed_cache.bump(*feeds))
+
+
+def touch_posts(**lookup):
+    """Меняет updated у постов, чтобы их карточки отрисовались заново."""
+    Post.objects.filter(**lookup).update(updated=timezone.now())
+
+
+def remember_fields(model, instance, fields):
+    """Сохранённые в базе значения полей для сравнения после save()."""
+    instance._old_fields = None
+    if instance.pk is not None:
+        instance._old_fields = model.objects.filter(
+            pk=instance.pk).values_list(*fields).first()
+
+
+def fields_changed(instance, fields):
+    old = getattr(instance, '_old_fields', None)
+    if old is None:
+        return False
+    return old != tuple(getattr(instance, field) for field in fields)
+
+
+def post_feeds(post):
+    feeds = ['index', f'author:{post.author_id}', f'post:{post.pk}']
+    if post.group_id:
+        feeds.append(f'group:{post.group_id}')
+    return feeds
+
+
+def follow_feeds(follow):
+    # Счётчики подписок и кнопка подписки на страницах профилей.
+    return [f'profile:{follow.author_id}', f'profile:{follow.user_id}']
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, **kwargs):
+    instance._old_group_id = None
+    if instance.pk is not None:
+        instance._old_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    invalidate_feeds(*post_feeds(instance))
+    search.get_backend().index([instance])
+    if instance.image:
+        name = instance.image.name
+        transaction.on_commit(lambda: thumbnails.schedule(name))
+    if created:
+        counters.post_created(instance)
+        timeline.fan_out(instance)
+        return
+    old_group_id = getattr(instance, '_old_group_id', None)
+    if old_group_id != instance.group_id:
+        counters.post_group_changed(old_group_id, instance.group_id)
+        if old_group_id:
+            invalidate_feeds(f'group:{old_group_id}')
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    invalidate_feeds(*post_feeds(instance))
+    search.get_backend().remove([instance.pk])
+    counters.post_deleted(instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        counters.comment_changed(instance, 1)
+        invalidate_feeds(f'post:{instance.post_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.comment_changed(instance, -1)
+    invalidate_feeds(f'post:{instance.post_id}')
+
+
+@receiver(pre_save, sender=Group)
+def group_changing(sender, instance, **kwargs):
+    remember_fields(Group, instance, CARD_GROUP_FIELDS)
+
+
+@receiver(post_save, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    if fields_changed(instance, CARD_GROUP_FIELDS):
+        touch_posts(group=instance)
+    invalidate_feeds('relations')
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    # Посты остаются без группы через UPDATE, минуя save().
+    touch_posts(group=instance)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    invalidate_feeds('relations')
+
+
+@receiver(pre_save, sender=User)
+def user_changing(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        instance._old_fields = None
+        return
+    remember_fields(User, instance, CARD_USER_FIELDS)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        Profile.objects.get_or_create(user=instance)
+    # Вход пользователя обновляет только last_login — ленты не меняются.
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    # Регистрация, смена пароля и прочие поля не видны в лентах.
+    if fields_changed(instance, CARD_USER_FIELDS):
+        touch_posts(author=instance)
+        invalidate_feeds('relations')
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        counters.follow_changed(instance, 1)
+        timeline.backfill(instance)
+        invalidate_feeds(*follow_feeds(instance))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.follow_changed(instance, -1)
+    timeline.remove(instance)
+    timeline.demote(instance.author_id)
+    invalidate_feeds(*follow_feeds(instance))
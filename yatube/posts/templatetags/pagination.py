@@ -0,0 +1,51 @@
+from django import template
+
+register = template.Library()
+
+# Сколько номеров показывать по сторонам от текущей страницы и с краёв.
+ON_EACH_SIDE = 2
+ON_ENDS = 1
+
+
+def window(number, num_pages, approximate=False, on_each_side=ON_EACH_SIDE,
+           on_ends=ON_ENDS):
+    """Номера страниц вокруг текущей и с краёв, None на месте пропуска.
+
+    Перебираются только сами номера окна, поэтому стоимость не зависит
+    от числа страниц. При approximate число страниц оценочное: последние
+    страницы не показываются, окно заканчивается пропуском.
+    """
+    ranges = [
+        range(1, min(on_ends, num_pages) + 1),
+        range(max(1, number - on_each_side),
+              min(num_pages, number + on_each_side) + 1),
+    ]
+    if not approximate:
+        ranges.append(range(max(1, num_pages - on_ends + 1), num_pages + 1))
+    pages = []
+    last = 0
+    for numbers in ranges:
+        for page in numbers:
+            if page <= last:
+                continue
+            if page == last + 2:
+                pages.append(last + 1)
+            elif page > last + 2:
+                pages.append(None)
+            pages.append(page)
+            last = page
+    if last < num_pages:
+        pages.append(None)
+    return pages
+
+
+@register.simple_tag
+def page_window(page_obj):
+    """Номера страниц для навигации вместо всего paginator.page_range."""
+    paginator = page_obj.paginator
+    approximate = getattr(paginator, 'approximate', False)
+    num_pages = paginator.num_pages
+    if approximate:
+        # Дальше пронумерованных страниц лента листается курсором.
+        num_pages = min(num_pages, paginator.numbered_pages)
+    return window(page_obj.number, num_pages, approximate)
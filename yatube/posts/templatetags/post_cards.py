@@ -0,0 +1,52 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from posts import thumbnails
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+
+def card_key(post, variant, has_renditions):
+    """Ключ карточки меняется вместе с post.updated.
+
+    Смена имени автора или группы тоже обновляет updated у их постов
+    (см. posts.signals), а появление копий картинки — has_renditions.
+    """
+    return (f'post-card:{post.pk}:{post.updated.timestamp()}:'
+            f'{variant}:{int(has_renditions)}')
+
+
+@register.simple_tag
+def post_cards(posts, width, show_author=True, show_group=True):
+    """HTML карточек постов страницы: из кеша, недостающие рендерятся.
+
+    Кеш читается и пишется одним обращением на всю страницу, шаблону
+    остаётся вывести готовые карточки в цикле.
+    """
+    posts = list(posts)
+    variant = f'{width}:{int(show_author)}:{int(show_group)}'
+    manifests = thumbnails.lookup_many(post.image for post in posts)
+    keys = [
+        card_key(post, variant, bool(manifests.get(post.image.name)))
+        for post in posts
+    ]
+    cached = cache.get_many(keys)
+    missing = {}
+    card = get_template(CARD_TEMPLATE)
+    for post, key in zip(posts, keys):
+        if key not in cached:
+            missing[key] = card.render({
+                'post': post,
+                'width': width,
+                'show_author': show_author,
+                'show_group': show_group,
+            })
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+        cached.update(missing)
+    return [mark_safe(cached[key]) for key in keys]
@@ -0,0 +1,34 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def post_picture(image, width):
+    """<picture> с копиями картинки разных ширин и форматов.
+
+    width — ширина, с которой картинка показывается на странице.
+    """
+    manifest = thumbnails.lookup(image)
+    fallback = manifest.get('JPEG', [])
+    if fallback:
+        src = fallback[-1][1]
+    else:
+        src = image.url if image else ''
+    return {
+        'image': image,
+        'width': width,
+        'sizes': f'(max-width: {width}px) 100vw, {width}px',
+        'sources': [
+            {
+                'type': f'image/{image_format.lower()}',
+                'srcset': ', '.join(
+                    f'{url} {size}w' for size, url in manifest[image_format]),
+            }
+            for image_format in manifest if image_format != 'JPEG'
+        ],
+        'src': src,
+        'srcset': ', '.join(f'{url} {size}w' for size, url in fallback),
+    }
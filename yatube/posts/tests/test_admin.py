@@ -0,0 +1,89 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.admin import EstimatedCountPaginator, PostAdmin
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='Admin', email='admin@example.com', password='pass')
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {i}', slug=f'group{i}', description='Описание')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(PostAdminTests.admin)
+        self.url = reverse('admin:posts_post_changelist')
+        cache.clear()
+
+    def add_posts(self, count):
+        for i in range(count):
+            Post.objects.create(
+                author=self.admin, text=f'Пост {i}',
+                group=self.groups[i % len(self.groups)])
+
+    def count_queries(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow(self):
+        """Число запросов списка не зависит от числа строк."""
+        self.add_posts(2)
+        self.count_queries()
+        few = self.count_queries()
+        self.add_posts(20)
+        self.assertEqual(self.count_queries(), few)
+
+    def test_cursor_pages(self):
+        """За пронумерованными страницами список листается курсором."""
+        self.add_posts(7)
+        with patch.object(PostAdmin, 'list_per_page', 2), \
+                patch.object(EstimatedCountPaginator, 'count_limit', 4):
+            response = self.admin_client.get(self.url, {'p': 1})
+            cl = response.context['cl']
+            self.assertEqual(cl.paginator.num_pages, 2)
+            seen = [post.pk for post in cl.result_list]
+            url = cl.next_url
+            while url:
+                response = self.admin_client.get(self.url + url)
+                cl = response.context['cl']
+                self.assertTrue(cl.cursor_mode)
+                seen += [post.pk for post in cl.result_list]
+                url = cl.next_url
+        expected = list(Post.objects.order_by('-pub_date', '-id')
+                        .values_list('pk', flat=True)[2:])
+        self.assertEqual(seen, expected)
+
+    def test_count_is_bounded(self):
+        """Отфильтрованный список не считается дальше count_limit."""
+        self.add_posts(6)
+        queryset = Post.objects.filter(text__startswith='Пост')
+        with patch.object(EstimatedCountPaginator, 'count_limit', 4):
+            paginator = EstimatedCountPaginator(queryset, 2)
+            self.assertEqual((paginator.count, paginator.num_pages), (4, 2))
+
+    def test_date_hierarchy(self):
+        """Фильтр по дате работает через date_hierarchy."""
+        self.add_posts(1)
+        post = Post.objects.get()
+        response = self.admin_client.get(self.url, {
+            'pub_date__year': post.pub_date.year,
+        })
+        self.assertEqual(list(response.context['cl'].result_list), [post])
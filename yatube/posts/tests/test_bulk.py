@@ -0,0 +1,185 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from posts import bulk, feed_cache
+from posts.models import Comment, Follow, Group, Post, Profile, Timeline
+
+User = get_user_model()
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+KINDS = ('groups', 'posts', 'comments', 'follows')
+
+
+class BulkTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='Author')
+        self.reader = User.objects.create_user(username='Reader')
+        self.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug', description='Описание')
+        self.posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}',
+                                group=self.group if i % 2 else None)
+            for i in range(5)
+        ]
+        Comment.objects.create(
+            author=self.reader, post=self.posts[0], text='Комментарий')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def path(self, name):
+        return os.path.join(TEMP_DIR, name)
+
+    def export(self, fmt):
+        for kind in KINDS:
+            call_command('export_content', kind, self.path(f'{kind}.{fmt}'),
+                         chunk_size=2, stdout=StringIO())
+
+    def import_all(self, fmt):
+        for kind in KINDS:
+            call_command('import_content', kind, self.path(f'{kind}.{fmt}'),
+                         batch_size=2, stdout=StringIO())
+
+    def snapshot(self):
+        return (
+            list(Group.objects.values_list('id', 'slug', 'title')),
+            list(Post.objects.order_by('id').values_list(
+                'id', 'author__username', 'group__slug', 'pub_date', 'text')),
+            list(Comment.objects.values_list(
+                'id', 'post_id', 'author__username', 'pub_date', 'text')),
+            list(Follow.objects.values_list(
+                'user__username', 'author__username')),
+        )
+
+    def test_round_trip(self):
+        """Выгрузка и загрузка в пустую базу сохраняют записи и даты."""
+        for fmt in bulk.FORMATS:
+            with self.subTest(fmt=fmt):
+                self.export(fmt)
+                before = self.snapshot()
+                User.objects.all().delete()
+                Group.objects.all().delete()
+                self.import_all(fmt)
+                self.assertEqual(self.snapshot(), before)
+                reader = User.objects.get(username='Reader')
+                self.assertEqual(Timeline.objects.filter(
+                    user=reader).count(), len(self.posts))
+                self.assertEqual(Profile.objects.get(
+                    user__username='Author').posts_count, len(self.posts))
+
+    def test_export_resumes_from_checkpoint(self):
+        """Выгрузка продолжается после последнего выгруженного id."""
+        checkpoint = self.path('export.json')
+        path = self.path('resume.ndjson')
+        with open(path, 'w') as stream:
+            rows = bulk.write_rows(bulk.export_rows('posts'), stream,
+                                   'ndjson', bulk.COLUMNS['posts'])
+            first = [next(rows), next(rows)]
+        bulk.Checkpoint(checkpoint).save(last_id=first[-1]['id'], rows=2)
+        call_command('export_content', 'posts', path,
+                     checkpoint=checkpoint, stdout=StringIO())
+        with open(path) as stream:
+            ids = [json.loads(line)['id'] for line in stream]
+        self.assertEqual(ids, sorted(post.pk for post in self.posts))
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_import_resumes_from_checkpoint(self):
+        """Загрузка пропускает строки до контрольной точки."""
+        path = self.path('groups.ndjson')
+        with open(path, 'w') as stream:
+            for i in range(4):
+                stream.write(json.dumps({
+                    'id': 100 + i, 'title': f'Группа {i}',
+                    'slug': f'group{i}', 'description': '',
+                }) + '\n')
+        checkpoint = self.path('import.json')
+        bulk.Checkpoint(checkpoint).save(rows=3)
+        out = StringIO()
+        call_command('import_content', 'groups', path,
+                     checkpoint=checkpoint, stdout=out)
+        self.assertEqual(
+            list(Group.objects.filter(id__gte=100).values_list(
+                'slug', flat=True)),
+            ['group3'],
+        )
+        self.assertIn('строк/с', out.getvalue())
+
+    def test_export_resume_drops_partial_chunk(self):
+        """Записанное после контрольной точки не повторяется в выгрузке."""
+        checkpoint = self.path('partial.json')
+        path = self.path('partial.ndjson')
+        with open(path, 'w') as stream:
+            rows = bulk.write_rows(bulk.export_rows('posts'), stream,
+                                   'ndjson', bulk.COLUMNS['posts'])
+            first = [next(rows), next(rows)]
+            stream.flush()
+            offset = stream.tell()
+            next(rows)
+            stream.write('{"id": 4, "te')
+        bulk.Checkpoint(checkpoint).save(
+            last_id=first[-1]['id'], rows=2, offset=offset)
+        call_command('export_content', 'posts', path,
+                     checkpoint=checkpoint, stdout=StringIO())
+        with open(path) as stream:
+            ids = [json.loads(line)['id'] for line in stream]
+        self.assertEqual(ids, sorted(post.pk for post in self.posts))
+
+    def test_import_bumps_feeds(self):
+        """Загрузка комментариев и подписок обновляет версии их лент."""
+        self.export('ndjson')
+        feeds = [f'post:{self.posts[0].pk}', f'profile:{self.author.pk}',
+                 'relations']
+        Comment.objects.all().delete()
+        Follow.objects.all().delete()
+        versions = feed_cache.get_versions(feeds)
+        for kind in ('comments', 'follows'):
+            call_command('import_content', kind,
+                         self.path(f'{kind}.ndjson'), stdout=StringIO())
+        after = feed_cache.get_versions(feeds)
+        self.assertTrue(all(new > old for new, old in zip(after, versions)))
+
+    def import_queries(self):
+        """Запросы на загрузку всех постов одной пачкой."""
+        path = self.path('posts-queries.ndjson')
+        call_command('export_content', 'posts', path, stdout=StringIO())
+        Post.objects.all().delete()
+        with CaptureQueriesContext(connection) as context:
+            call_command('import_content', 'posts', path, batch_size=100,
+                         stdout=StringIO())
+        return len(context.captured_queries)
+
+    def test_import_fan_out_batched(self):
+        """Раскладка по лентам не добавляет запросов на каждый пост."""
+        few = self.import_queries()
+        self.assertEqual(Timeline.objects.filter(user=self.reader).count(), 5)
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Ещё {i}') for i in range(20))
+        self.assertEqual(self.import_queries(), few)
+        self.assertEqual(
+            Timeline.objects.filter(user=self.reader).count(), 25)
+
+    def test_truncate_to_last_line(self):
+        """Без offset файл обрезается по последней полной строке."""
+        path = self.path('tail.ndjson')
+        with open(path, 'wb') as stream:
+            stream.write(b'{"id": 1}\n{"id": 2}\n{"id": 3, "te')
+        self.assertEqual(bulk.last_line_end(path, block_size=4), 20)
+        bulk.truncate(path)
+        with open(path, 'rb') as stream:
+            self.assertEqual(stream.read(), b'{"id": 1}\n{"id": 2}\n')
+        with open(path, 'wb') as stream:
+            stream.write(b'{"id": 1, "te')
+        self.assertEqual(bulk.last_line_end(path, block_size=4), 0)
@@ -0,0 +1,126 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase
+
+from posts import feed_cache
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='Author', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.author, text='Текст поста', group=self.group)
+
+    def render(self):
+        return Template(
+            '{% load post_cards %}{% post_cards posts 650 as cards %}'
+            '{% for card in cards %}{{ card }}{% endfor %}'
+        ).render(Context({'posts': Post.objects.for_feed()}))
+
+    def test_card_is_cached(self):
+        """Карточка берётся из кеша, пока пост не изменён через save()."""
+        self.render()
+        Post.objects.update(text='Обновлено в обход save()')
+        self.assertIn('Текст поста', self.render())
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertIn('Новый текст', self.render())
+
+    def test_author_name_change(self):
+        """Смена имени автора обновляет его карточки."""
+        self.render()
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = 'Алексей'
+        author.save()
+        self.assertIn('Алексей Толстой', self.render())
+
+    def test_group_change(self):
+        """Переименование и удаление группы обновляют карточки."""
+        self.render()
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        self.assertIn('Новое название', self.render())
+        group.delete()
+        self.assertNotIn('все записи группы', self.render())
+
+    def test_unrelated_user_save_keeps_cards(self):
+        """Сохранение пользователя без смены имени не трогает посты."""
+        updated = Post.objects.get(pk=self.post.pk).updated
+        author = User.objects.get(pk=self.author.pk)
+        author.set_password('new-password')
+        author.save()
+        self.assertEqual(Post.objects.get(pk=self.post.pk).updated, updated)
+
+    def test_signup_keeps_feed_versions(self):
+        """Регистрация и смена пароля не сбрасывают кеш лент."""
+        versions = feed_cache.get_versions(['relations'])
+        user = User.objects.create_user(username='Newcomer')
+        user.set_password('new-password')
+        user.save()
+        self.assertEqual(feed_cache.get_versions(['relations']), versions)
+        user.first_name = 'Имя'
+        user.save()
+        self.assertNotEqual(
+            feed_cache.get_versions(['relations']), versions)
+
+
+class GetOrComputeTests(SimpleTestCase):
+    key = 'feed-page:test'
+    lock_key = 'feed-page:test:lock'
+
+    def setUp(self):
+        cache.clear()
+        cache.add(self.lock_key, 'other', feed_cache.LOCK_TIMEOUT)
+
+    def recompute(self):
+        raise AssertionError('Пересчёт без блокировки')
+
+    def test_waits_for_holder(self):
+        """Без записи и без блокировки ждём значение, а не считаем сами."""
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 20:
+                feed_cache.store(self.key, lambda: 'готово', 60)
+
+        with patch('posts.feed_cache.time.sleep', sleep):
+            value = feed_cache.get_or_compute(self.key, self.recompute)
+        self.assertEqual(value, 'готово')
+        self.assertEqual(cache.get(self.lock_key), 'other')
+
+    def test_takes_expired_lock(self):
+        """Истёкшую блокировку забирает ждущий и снимает после пересчёта."""
+        def sleep(seconds):
+            cache.delete(self.lock_key)
+
+        with patch('posts.feed_cache.time.sleep', sleep):
+            value = feed_cache.get_or_compute(self.key, lambda: 'своё')
+        self.assertEqual(value, 'своё')
+        self.assertIsNone(cache.get(self.lock_key))
+
+    @patch('posts.feed_cache.LOCK_TIMEOUT', 0)
+    def test_keeps_foreign_lock(self):
+        """Чужая блокировка не снимается даже после пересчёта по таймауту."""
+        value = feed_cache.get_or_compute(self.key, lambda: 'своё')
+        self.assertEqual(value, 'своё')
+        self.assertEqual(cache.get(self.lock_key), 'other')
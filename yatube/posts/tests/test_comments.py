@@ -0,0 +1,73 @@
+import re
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+CURSOR_RE = re.compile(r'data-url="[^"]*\?cursor=([^"]+)"')
+
+
+@patch('posts.views.COMMENTS_PER_PAGE', 4)
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        now = timezone.now()
+        # Пары комментариев с одинаковой датой проверяют порядок по id.
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Комментарий {i}',
+                    pub_date=now + timedelta(minutes=i // 2))
+            for i in range(10)
+        )
+        Post.objects.filter(pk=cls.post.pk).update(comments_count=10)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.detail = reverse('posts:post_detail', args=[self.post.pk])
+        self.more = reverse('posts:post_comments', args=[self.post.pk])
+
+    def test_first_page(self):
+        """На странице поста первая порция комментариев и счётчик."""
+        response = self.client.get(self.detail)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            [f'Комментарий {i}' for i in range(4)],
+        )
+        self.assertContains(response, 'Показать ещё комментарии')
+
+    def test_lazy_load_all(self):
+        """Подгрузка по курсору проходит все комментарии по порядку."""
+        response = self.client.get(self.detail)
+        seen = [comment.pk for comment in response.context['comments']]
+        cursor = CURSOR_RE.search(response.content.decode()).group(1)
+        while cursor:
+            response = self.client.get(self.more, {'cursor': cursor})
+            seen += [comment.pk for comment in response.context['comments']]
+            match = CURSOR_RE.search(response.content.decode())
+            cursor = match and match.group(1)
+        self.assertEqual(seen, list(Comment.objects.order_by(
+            'pub_date', 'id').values_list('pk', flat=True)))
+
+    def test_count_from_counter(self):
+        """Число комментариев берётся из счётчика, без COUNT(*)."""
+        Post.objects.filter(pk=self.post.pk).update(comments_count=12345)
+        response = self.client.get(self.detail)
+        self.assertContains(response, '12345')
+
+    def test_query_count(self):
+        """Подгрузка — запрос поста и один запрос комментариев с авторами."""
+        cursor = self.client.get(self.detail).context['comments'].next_cursor
+        with self.assertNumQueries(3):
+            # Пост для 304-проверки, пост и страница комментариев.
+            self.client.get(self.more, {'cursor': cursor})
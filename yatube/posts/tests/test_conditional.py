@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug',
+            description='Тестовое описание')
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовый пост', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        ]
+
+    def revalidate(self, url, client=None):
+        client = client or self.guest_client
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_not_modified(self):
+        """Неизменившаяся страница отдаётся ответом 304."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.revalidate(url).status_code, 304)
+
+    def test_if_modified_since(self):
+        """Last-Modified тоже проверяется."""
+        response = self.guest_client.get(self.urls[0])
+        response = self.guest_client.get(
+            self.urls[0], HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_no_queries_for_index(self):
+        """Для 304 на главной запросы к базе не нужны."""
+        etag = self.guest_client.get(self.urls[0])['ETag']
+        with self.assertNumQueries(0):
+            self.guest_client.get(self.urls[0], HTTP_IF_NONE_MATCH=etag)
+
+    def test_new_post_changes_etag(self):
+        """Новый пост меняет ETag лент автора и группы."""
+        etags = [self.guest_client.get(url)['ETag'] for url in self.urls[:3]]
+        Post.objects.create(
+            author=self.author, text='Новый пост', group=self.group)
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_comment_and_follow_change_etag(self):
+        """Комментарий меняет страницу поста, подписка — профиль."""
+        detail, profile = self.urls[3], self.urls[2]
+        etags = [self.guest_client.get(url)['ETag'] for url in (detail,
+                                                                profile)]
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        Follow.objects.create(user=self.reader, author=self.author)
+        for url, etag in zip((detail, profile), etags):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_per_user_pages(self):
+        """Страницы пользователей не общие и не совпадают с гостевыми."""
+        url = self.urls[2]
+        guest = self.guest_client.get(url)
+        reader = self.reader_client.get(url)
+        self.assertNotEqual(guest['ETag'], reader['ETag'])
+        self.assertIn('public', guest['Cache-Control'])
+        self.assertIn('private', reader['Cache-Control'])
+        self.assertIn('Cookie', reader['Vary'])
+        response = self.reader_client.get(
+            url, HTTP_IF_NONE_MATCH=guest['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.revalidate(url, self.reader_client).status_code,
+                         304)
+
+    def test_missing_objects(self):
+        """Для несуществующих объектов ответ 404 без валидаторов."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
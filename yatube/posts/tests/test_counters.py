@@ -0,0 +1,117 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import bulk
+from posts.models import Comment, Follow, Group, Post, Profile
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.group_2 = Group.objects.create(
+            title='Тестовая группа 2',
+            slug='test_slug2',
+            description='Тестовое описание 2',
+        )
+
+    def refresh(self):
+        return (
+            Profile.objects.get(user=self.author),
+            Profile.objects.get(user=self.reader),
+            Group.objects.get(pk=self.group.pk),
+            Group.objects.get(pk=self.group_2.pk),
+        )
+
+    def test_post_counters(self):
+        """Счётчики постов автора и группы следуют за постами."""
+        post = Post.objects.create(
+            author=self.author, text='Пост', group=self.group)
+        Post.objects.create(author=self.author, text='Пост без группы')
+        author, _, group, group_2 = self.refresh()
+        self.assertEqual(author.posts_count, 2)
+        self.assertEqual(group.posts_count, 1)
+        post.group = self.group_2
+        post.save()
+        _, _, group, group_2 = self.refresh()
+        self.assertEqual((group.posts_count, group_2.posts_count), (0, 1))
+        post.delete()
+        author, _, _, group_2 = self.refresh()
+        self.assertEqual(author.posts_count, 1)
+        self.assertEqual(group_2.posts_count, 0)
+
+    def test_comment_and_follow_counters(self):
+        """Счётчики комментариев и подписок."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        comment = Comment.objects.create(
+            author=self.reader, post=post, text='Комментарий')
+        Comment.objects.create(author=self.author, post=post, text='Ответ')
+        comment.delete()
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        author, reader, _, _ = self.refresh()
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(reader.following_count, 1)
+        follow.delete()
+        author, reader, _, _ = self.refresh()
+        self.assertEqual(author.followers_count, 0)
+        self.assertEqual(reader.following_count, 0)
+
+    def test_rebuild_counters_command(self):
+        """Команда rebuild_counters исправляет расхождения."""
+        post = Post.objects.create(
+            author=self.author, text='Пост', group=self.group)
+        Comment.objects.create(author=self.reader, post=post, text='Текст')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Profile.objects.update(
+            posts_count=7, followers_count=7, following_count=7)
+        Group.objects.update(posts_count=7)
+        Post.objects.update(comments_count=7)
+        Profile.objects.filter(user=self.reader).delete()
+        call_command('rebuild_counters', stdout=StringIO())
+        author, reader, group, group_2 = self.refresh()
+        self.assertEqual(
+            (author.posts_count, author.followers_count), (1, 1))
+        self.assertEqual(
+            (reader.posts_count, reader.following_count), (0, 1))
+        self.assertEqual((group.posts_count, group_2.posts_count), (1, 0))
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+
+    def test_profile_page_without_profile(self):
+        """Профиль пользователя без строки Profile создаётся с подсчётом."""
+        Post.objects.create(author=self.author, text='Пост')
+        Profile.objects.filter(user=self.author).delete()
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'Author'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['count'], 1)
+        self.assertEqual(self.refresh()[0].posts_count, 1)
+
+    def test_post_page_without_profile(self):
+        """На странице поста число постов автора без Profile считается."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Post.objects.create(author=self.author, text='Ещё пост')
+        Profile.objects.filter(user=self.author).delete()
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<span > 2 </span>')
+
+    def test_imported_users_get_profiles(self):
+        """Пользователи, созданные при загрузке, сразу получают профиль."""
+        ids = bulk.user_ids(['Imported', 'Author'])
+        self.assertTrue(
+            Profile.objects.filter(user_id=ids['Imported']).exists())
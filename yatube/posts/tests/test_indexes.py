@@ -0,0 +1,78 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Признаки плана SQLite, при которых лента читается полным проходом
+# по таблице с последующей сортировкой.
+FULL_SCAN_MARKERS = ('USE TEMP B-TREE',)
+FEED_TABLES = ('posts_post', 'posts_comment', 'posts_timeline')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'План запроса в формате SQLite')
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(15):
+            post = Post.objects.create(
+                author=cls.author, text=f'Пост {i}', group=cls.group)
+            Comment.objects.create(
+                author=cls.reader, post=post, text=f'Комментарий {i}')
+        cls.post = post
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(QueryPlanTests.reader)
+        cache.clear()
+
+    def ordered_feed_queries(self, address):
+        with CaptureQueriesContext(connection) as queries:
+            self.reader_client.get(address)
+        return [
+            query['sql'] for query in queries.captured_queries
+            if 'ORDER BY' in query['sql']
+            and any(f'FROM "{table}"' in query['sql']
+                    for table in FEED_TABLES)
+        ]
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return ' | '.join(str(row[-1]) for row in cursor.fetchall())
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент не сортируют таблицу целиком."""
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?cursor=',
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:follow_index'),
+            reverse('posts:follow_index') + '?cursor=',
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for address in addresses:
+            queries = self.ordered_feed_queries(address)
+            self.assertTrue(queries, f'{address}: нет запроса ленты')
+            for sql in queries:
+                with self.subTest(address=address, sql=sql):
+                    plan = self.explain(sql)
+                    for marker in FULL_SCAN_MARKERS:
+                        self.assertNotIn(marker, plan, plan)
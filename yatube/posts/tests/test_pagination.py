@@ -0,0 +1,172 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post, Timeline
+from posts.templatetags.pagination import window
+from posts.utils import CountedPaginator, paginate
+
+User = get_user_model()
+
+
+class PageWindowTests(SimpleTestCase):
+    def test_small_paginator(self):
+        """Немного страниц выводятся все, без пропусков."""
+        self.assertEqual(window(2, 5), [1, 2, 3, 4, 5])
+
+    def test_elided(self):
+        """Вокруг текущей страницы окно, между краями пропуски."""
+        self.assertEqual(window(50, 100000),
+                         [1, None, 48, 49, 50, 51, 52, None, 100000])
+
+    def test_single_gap_filled(self):
+        """Вместо пропуска одной страницы выводится сама страница."""
+        self.assertEqual(window(4, 10), [1, 2, 3, 4, 5, 6, None, 10])
+
+    def test_approximate(self):
+        """При оценочном числе страниц последние не показываются."""
+        self.assertEqual(window(1, 100000, approximate=True),
+                         [1, 2, 3, None])
+
+    def test_rendered_links_bounded(self):
+        """Шаблон навигации не растёт с числом страниц."""
+        paginator = Paginator(range(10 ** 7), 10)
+        html = render_to_string('posts/includes/paginator.html',
+                                {'page_obj': paginator.page(500)})
+        self.assertLess(html.count('page-item'), 15)
+        self.assertIn('page=1000000', html)
+
+
+class CountedPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание')
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост {i}')
+            for i in range(25))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_known_count(self):
+        """Готовое число строк не требует запроса."""
+        paginator = CountedPaginator(Post.objects.all(), 10, count=7)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.num_pages, 1)
+
+    def test_cached_count(self):
+        """COUNT(*) с cache_key считается один раз."""
+        self.assertEqual(
+            CountedPaginator(Post.objects.all(), 10, cache_key='all').count,
+            25)
+        with self.assertNumQueries(0):
+            self.assertEqual(CountedPaginator(
+                Post.objects.all(), 10, cache_key='all').count, 25)
+
+    def test_many_pages(self):
+        """many_pages считает строки только до PAGE_NUMBER_LIMIT страниц."""
+        queryset = Post.objects.filter(author=self.user)
+        paginator = CountedPaginator(queryset, 10, many_pages=True)
+        self.assertEqual((paginator.count, paginator.approximate),
+                         (25, False))
+        with patch('posts.utils.PAGE_NUMBER_LIMIT', 1):
+            paginator = CountedPaginator(queryset, 10, many_pages=True)
+            self.assertEqual((paginator.count, paginator.approximate,
+                              paginator.lower_bound), (10, True, True))
+            page_obj = paginate(RequestFactory().get('/'), queryset,
+                                many_pages=True)
+            html = render_to_string('posts/includes/paginator.html',
+                                    {'page_obj': page_obj})
+        self.assertIn('больше 1 стр.', html)
+        self.assertNotIn('около', html)
+
+    def test_many_pages_estimate(self):
+        """Для выборки без фильтров берётся оценка по статистике."""
+        with patch('posts.utils.PAGE_NUMBER_LIMIT', 1), \
+                patch('posts.utils.estimate_rows', return_value=5000):
+            paginator = CountedPaginator(Post.objects.all(), 10,
+                                         many_pages=True)
+            self.assertEqual((paginator.count, paginator.approximate,
+                              paginator.lower_bound), (5000, True, False))
+            html = render_to_string('posts/includes/paginator.html',
+                                    {'page_obj': paginator.page(1)})
+        self.assertIn('около 500 стр.', html)
+
+    def test_index_bounded_count(self):
+        """Главная не считает все посты: оценка вместо COUNT(*)."""
+        with patch('posts.utils.PAGE_NUMBER_LIMIT', 1), \
+                patch('posts.utils.estimate_rows', return_value=5000):
+            response = self.client.get(reverse('posts:index'))
+        paginator = response.context['page_obj'].paginator
+        self.assertEqual((paginator.count, paginator.approximate),
+                         (5000, True))
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        paginator = response.context['page_obj'].paginator
+        self.assertEqual((paginator.count, paginator.approximate),
+                         (25, False))
+
+    def test_group_uses_counter(self):
+        """Страница группы берёт число постов из Group.posts_count."""
+        Group.objects.filter(pk=self.group.pk).update(posts_count=95)
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}))
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 10)
+
+
+@patch('posts.utils.estimate_rows', return_value=None)
+class NumberedPagesLimitTests(TestCase):
+    """Лента без оценки числа строк: 150 постов, 10 пронумерованных страниц."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f't{i}') for i in range(150))
+        cls.posts = list(Post.objects.order_by('-pub_date', '-id'))
+        Timeline.objects.bulk_create(
+            Timeline(user=cls.reader, author=cls.author, post=post,
+                     pub_date=post.pub_date)
+            for post in cls.posts)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def check_transitions(self, url):
+        response = self.client.get(url, {'page': 10})
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.num_pages, 10)
+        self.assertIsNotNone(page_obj.next_cursor)
+        self.assertContains(response, f'?cursor={page_obj.next_cursor}')
+        self.assertNotContains(response, 'page=11')
+        self.assertContains(response, 'больше 10 стр.')
+        following = self.client.get(url, {'cursor': page_obj.next_cursor})
+        for number in (11, 12):
+            with self.subTest(page=number):
+                page_obj = self.client.get(
+                    url, {'page': number}).context['page_obj']
+                self.assertTrue(page_obj.cursor_mode)
+                self.assertEqual(list(page_obj),
+                                 list(following.context['page_obj']))
+                self.assertEqual(list(page_obj), self.posts[100:110])
+                self.assertTrue(page_obj.has_next())
+
+    def test_index(self, estimate_rows):
+        """Главная: после 10-й страницы — курсор, а не 11-я страница."""
+        self.check_transitions(reverse('posts:index'))
+
+    def test_follow_index(self, estimate_rows):
+        """Лента подписок: после 10-й страницы — курсор."""
+        self.check_transitions(reverse('posts:follow_index'))
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import PAGINATE_BY
+
+User = get_user_model()
+
+
+class QueryCountTests(TestCase):
+    """Число запросов страницы не зависит от числа постов и комментариев."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.authors = [
+            User.objects.create_user(username=f'Author{i}')
+            for i in range(PAGINATE_BY)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+        cls.post = Post.objects.create(
+            author=cls.authors[0], text='Пост', group=cls.group)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(QueryCountTests.reader)
+
+    def count_queries(self, address):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.reader_client.get(address)
+        return len(queries)
+
+    def add_posts(self, count):
+        for i in range(count):
+            Post.objects.create(
+                author=self.authors[i % len(self.authors)],
+                text=f'Пост {i}',
+                group=self.group,
+            )
+
+    def test_feeds_query_count(self):
+        """Ленты: одна и та же страница из 1 и из PAGINATE_BY постов."""
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.authors[0]}),
+            reverse('posts:follow_index'),
+        )
+        single = {address: self.count_queries(address)
+                  for address in addresses}
+        self.add_posts(PAGINATE_BY * 2)
+        for address in addresses:
+            with self.subTest(address=address):
+                self.assertEqual(self.count_queries(address),
+                                 single[address])
+
+    def test_post_detail_query_count(self):
+        """post_detail: число запросов не растёт с комментариями."""
+        address = reverse('posts:post_detail',
+                          kwargs={'post_id': self.post.pk})
+        Comment.objects.create(
+            author=self.reader, post=self.post, text='Комментарий')
+        single = self.count_queries(address)
+        for author in self.authors:
+            Comment.objects.create(
+                author=author, post=self.post, text='Комментарий')
+        self.assertEqual(self.count_queries(address), single)
@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from core.middleware import PIN_COOKIE
+from posts.models import Post
+
+User = get_user_model()
+
+REPLICA = 'replica1'
+
+
+class ReplicaReadYourWritesTests(TransactionTestCase):
+    """Основная база и реплика — две базы SQLite; реплика получает
+    изменения только при sync_replica(), то есть с задержкой."""
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.mkdtemp()
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': f'{cls.replica_dir}/replica.sqlite3',
+        }
+        connections.ensure_defaults(REPLICA)
+        connections.prepare_test_settings(REPLICA)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        shutil.rmtree(cls.replica_dir, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='Author')
+        self.post = Post.objects.create(author=self.author, text='Старый пост')
+        self.sync_replica()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.guest_client = Client()
+
+    def sync_replica(self):
+        primary, replica = connections['default'], connections[REPLICA]
+        primary.ensure_connection()
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
+
+    def test_author_reads_own_post(self):
+        """После публикации автор видит пост, пока реплика отстаёт."""
+        response = self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Свежий пост'})
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+        profile = reverse('posts:profile', args=[self.author.username])
+        self.assertNotContains(self.guest_client.get(profile), 'Свежий пост')
+        self.assertContains(self.author_client.get(profile), 'Свежий пост')
+
+        post = Post.objects.get(text='Свежий пост')
+        detail = reverse('posts:post_detail', args=[post.pk])
+        self.assertEqual(self.guest_client.get(detail).status_code, 404)
+        self.sync_replica()
+        self.assertEqual(self.guest_client.get(detail).status_code, 200)
+
+    def test_comment_pins_to_primary(self):
+        """Комментарий сразу виден автору на странице поста."""
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.author_client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Свежий комментарий'}, follow=True)
+        self.assertContains(response, 'Свежий комментарий')
+        self.assertNotContains(self.guest_client.get(detail),
+                               'Свежий комментарий')
+
+    def test_no_pin_without_write(self):
+        """Без записи в базу запрос не закрепляется за основной базой."""
+        response = self.author_client.post(
+            reverse('posts:add_comment', args=[self.post.pk]), {'text': ''})
+        self.assertNotIn(PIN_COOKIE, response.cookies)
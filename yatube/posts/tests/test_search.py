@@ -0,0 +1,107 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import search
+from posts.models import Post
+from posts.utils import PAGINATE_BY
+
+User = get_user_model()
+
+
+class StemTests(TestCase):
+    def test_word_forms_share_stem(self):
+        """Формы одного слова приводятся к одной основе."""
+        for forms in (
+            ('кошка', 'кошки', 'кошками'),
+            ('читать', 'читали', 'читает'),
+            ('красивая', 'красивый', 'красивые'),
+            ('ёжик', 'ежики'),
+        ):
+            with self.subTest(forms=forms):
+                self.assertEqual(len({search.stem(word) for word in forms}),
+                                 1)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    def setUp(self):
+        self.backend = search.get_backend()
+
+    def find(self, query):
+        return self.backend.search(query, 0, PAGINATE_BY)
+
+    def test_word_forms_found(self):
+        """Пост находится по другой форме слова, все слова обязательны."""
+        post = Post.objects.create(
+            author=self.user, text='Кошки любят рыбу')
+        Post.objects.create(author=self.user, text='Собаки любят кости')
+        self.assertEqual(self.find('кошка'), [post.pk])
+        self.assertEqual(self.find('любит КОШКА'), [post.pk])
+        self.assertEqual(self.find('кошка кость'), [])
+        self.assertEqual(self.backend.count('любить'), 2)
+
+    def test_ranking(self):
+        """Пост, где слово встречается чаще, идёт первым."""
+        rare = Post.objects.create(
+            author=self.user, text='Про погоду и немного про море')
+        often = Post.objects.create(
+            author=self.user, text='Море, море и снова море')
+        self.assertEqual(self.find('море'), [often.pk, rare.pk])
+
+    def test_index_follows_posts(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        post = Post.objects.create(author=self.user, text='Старый текст')
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(self.find('старый'), [])
+        self.assertEqual(self.find('новые'), [post.pk])
+        post.delete()
+        self.assertEqual(self.find('текст'), [])
+
+    def test_query_syntax_is_escaped(self):
+        """Кавычки и операторы FTS в запросе не ломают поиск."""
+        Post.objects.create(author=self.user, text='Текст')
+        for query in ('"', 'текст OR', 'NEAR(текст', '*', ''):
+            with self.subTest(query=query):
+                self.assertIsInstance(
+                    search.SearchResults(query).count(), int)
+
+    def test_search_page(self):
+        """Страница поиска листается с сохранением запроса."""
+        for i in range(PAGINATE_BY + 1):
+            Post.objects.create(author=self.user, text=f'Заметка {i}')
+        Post.objects.create(author=self.user, text='Другое')
+        response = Client().get(reverse('posts:search'), {'q': 'заметки'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, PAGINATE_BY + 1)
+        self.assertEqual(len(page_obj), PAGINATE_BY)
+        self.assertContains(response, '?q=%D0%B7%D0%B0%D0%BC%D0%B5%D1%82'
+                                      '%D0%BA%D0%B8&amp;page=2')
+        response = Client().get(reverse('posts:search'),
+                                {'q': 'заметки', 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 1)
+
+    def test_rebuild_command(self):
+        """rebuild_search_index строит индекс заново по всем постам."""
+        post = Post.objects.create(author=self.user, text='Кошки любят рыбу')
+        self.backend.remove([post.pk])
+        self.assertEqual(self.find('кошка'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.find('кошка'), [post.pk])
+
+    @override_settings(SEARCH_BACKEND=None)
+    def test_backend_by_vendor(self):
+        """Без SEARCH_BACKEND для баз без FTS5 ищет DatabaseBackend."""
+        with patch('posts.search.connection') as connection:
+            connection.vendor = 'postgresql'
+            backend = search.get_backend.__wrapped__()
+        self.assertIsInstance(backend, search.DatabaseBackend)
@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_file(name, size=(1000, 600)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def render(self, post):
+        return Template(
+            '{% load post_images %}{% post_picture post.image 650 %}'
+        ).render(Context({'post': post}))
+
+    def test_template_only_looks_up(self):
+        """До генерации шаблон отдаёт исходную картинку, после — копии."""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=image_file('red.jpg'))
+        self.assertEqual(thumbnails.lookup(post.image), {})
+        html = self.render(post)
+        self.assertIn(f'src="{post.image.url}"', html)
+        self.assertNotIn('srcset', html)
+        self.assertTrue(thumbnails.generate(post.image.name))
+        manifest = thumbnails.lookup(post.image)
+        self.assertEqual(set(manifest), set(thumbnails.FORMATS))
+        html = self.render(post)
+        for image_format, sizes in manifest.items():
+            self.assertEqual([width for width, _ in sizes],
+                             list(thumbnails.WIDTHS))
+            for width, url in sizes:
+                with self.subTest(image_format=image_format, width=width):
+                    self.assertIn(f'{url} {width}w', html)
+        self.assertIn('sizes="(max-width: 650px) 100vw, 650px"', html)
+
+    def test_renditions_have_requested_sizes(self):
+        """Копии имеют нужную ширину и формат."""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=image_file('sizes.jpg'))
+        thumbnails.generate(post.image.name)
+        for image_format, sizes in thumbnails.lookup(post.image).items():
+            for width, url in sizes:
+                name = url[len(settings.MEDIA_URL):]
+                with Image.open(f'{TEMP_MEDIA_ROOT}/{name}') as image:
+                    self.assertEqual(image.format, image_format)
+                    self.assertEqual(image.width, width)
+
+    def test_small_image_has_no_renditions(self):
+        """Картинка уже самой маленькой копии показывается как есть."""
+        post = Post.objects.create(
+            author=self.user, text='Пост',
+            image=image_file('small.jpg', size=(40, 30)))
+        self.assertTrue(thumbnails.generate(post.image.name))
+        self.assertEqual(thumbnails.lookup(post.image), {})
+        self.assertIn(f'src="{post.image.url}"', self.render(post))
+
+    def test_missing_source(self):
+        """Отсутствующий файл не ломает генерацию."""
+        self.assertFalse(thumbnails.generate('posts/missing.jpg'))
+
+    def test_generate_thumbnails_command(self):
+        """Команда создаёт миниатюры для уже загруженных картинок."""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=image_file('old.jpg'))
+        out = StringIO()
+        call_command('generate_thumbnails', workers=1, stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertTrue(thumbnails.lookup(post.image))
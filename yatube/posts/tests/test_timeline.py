@@ -0,0 +1,118 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, Timeline
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(TimelineTests.reader)
+
+    def follow_page_ids(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_follow_backfills_timeline(self):
+        """Подписка заполняет ленту уже опубликованными постами."""
+        old_post = Post.objects.create(author=self.author, text='Старый')
+        self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}))
+        self.assertTrue(Timeline.objects.filter(
+            user=self.reader, post=old_post).exists())
+        self.assertEqual(self.follow_page_ids(), [old_post.pk])
+
+    def test_new_post_fans_out(self):
+        """Новый пост попадает в ленты подписчиков при создании."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        first = Post.objects.create(author=self.author, text='Первый')
+        second = Post.objects.create(author=self.author, text='Второй')
+        self.assertEqual(
+            Timeline.objects.filter(user=self.reader).count(), 2)
+        self.assertEqual(self.follow_page_ids(), [second.pk, first.pk])
+
+    def test_unfollow_and_delete_clean_timeline(self):
+        """Отписка и удаление поста убирают записи из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост')
+        Post.objects.create(author=self.author, text='Ещё пост')
+        post.delete()
+        self.assertEqual(
+            Timeline.objects.filter(user=self.reader).count(), 1)
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}))
+        self.assertFalse(Timeline.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.follow_page_ids(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_celebrity_posts_read_on_demand(self):
+        """Посты популярного автора не раскладываются, но видны в ленте."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Для всех')
+        self.assertFalse(Timeline.objects.exists())
+        self.assertEqual(self.follow_page_ids(), [post.pk])
+
+    def test_rebuild(self):
+        """rebuild() восстанавливает ленты по подпискам и постам."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост')
+        Timeline.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.follow_page_ids(), [post.pk])
+
+    def test_demoted_author_backfilled(self):
+        """Автор, ставший непопулярным, раскладывается по лентам."""
+        other = User.objects.create_user(username='Other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        with override_settings(TIMELINE_FANOUT_LIMIT=1):
+            post = Post.objects.create(author=self.author, text='Для всех')
+            self.assertFalse(Timeline.objects.exists())
+            Follow.objects.filter(user=other).delete()
+        self.assertTrue(Timeline.objects.filter(
+            user=self.reader, post=post).exists())
+
+    def test_fan_out_many_queries(self):
+        """Пачка постов раскладывается за постоянное число запросов."""
+        authors = [User.objects.create_user(username=f'Author{i}')
+                   for i in range(3)]
+        for author in authors:
+            Follow.objects.create(user=self.reader, author=author)
+        Post.objects.bulk_create(
+            Post(author=author, text=f'Пост {i}')
+            for i in range(4) for author in authors)
+        posts = list(Post.objects.all())
+        # Знаменитости, подписчики, вставка.
+        with self.assertNumQueries(3):
+            timeline.fan_out_many(posts)
+        self.assertEqual(
+            Timeline.objects.filter(user=self.reader).count(), 12)
+
+    @override_settings(TIMELINE_BATCH_SIZE=2)
+    def test_demote_batched(self):
+        """demote читает посты автора раз на пачку подписчиков."""
+        readers = [User.objects.create_user(username=f'Reader{i}')
+                   for i in range(4)]
+        for reader in readers:
+            Follow.objects.create(user=reader, author=self.author)
+        Post.objects.create(author=self.author, text='Пост')
+        Timeline.objects.all().delete()
+        with override_settings(TIMELINE_FANOUT_LIMIT=4):
+            # Профиль, подписки и по три запроса на каждую из двух пачек:
+            # знаменитости, посты автора, вставка.
+            with self.assertNumQueries(8):
+                timeline.demote(self.author.pk)
+        self.assertEqual(Timeline.objects.count(), 4)
@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+from posts.uploads import ORIENTATION, SizeLimitUploadHandler
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_file(name, size=(40, 30), image_format='JPEG', exif=None):
+    buffer = BytesIO()
+    options = {'exif': exif} if exif else {}
+    Image.new('RGB', size, 'red').save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ImageUploadTests.user)
+
+    def create(self, image):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': image},
+        )
+
+    def saved_image(self):
+        post = Post.objects.get()
+        return Image.open(f'{TEMP_MEDIA_ROOT}/{post.image.name}')
+
+    def test_metadata_stripped(self):
+        """Картинка сохраняется без EXIF, но с учётом поворота."""
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        exif[0x010F] = 'SecretCam'
+        for name, image_format in (('exif.jpg', 'JPEG'), ('exif.png', 'PNG')):
+            with self.subTest(image_format=image_format):
+                Post.objects.all().delete()
+                self.create(image_file(name, image_format=image_format,
+                                       exif=exif.tobytes()))
+                with self.saved_image() as image:
+                    self.assertEqual(image.format, image_format)
+                    self.assertEqual(image.size, (30, 40))
+                    self.assertFalse(image.getexif())
+                    self.assertNotIn('exif', image.info)
+                post = Post.objects.get()
+                with open(post.image.path, 'rb') as saved:
+                    self.assertNotIn(b'SecretCam', saved.read())
+
+    @override_settings(IMAGE_MAX_SIDE=20)
+    def test_large_side_reduced(self):
+        """Большая картинка уменьшается до IMAGE_MAX_SIDE."""
+        self.create(image_file('large.png', image_format='PNG'))
+        with self.saved_image() as image:
+            self.assertEqual(image.format, 'PNG')
+            self.assertEqual(max(image.size), 20)
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels(self):
+        """Картинка с большим числом пикселей отклоняется по заголовку."""
+        response = self.create(image_file('bomb.jpg'))
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(response, 'form', 'image',
+                             'Картинка 40x30 слишком велика.')
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=100)
+    def test_oversized_upload(self):
+        """Слишком большой файл отклоняется с ошибкой о размере."""
+        response = self.create(image_file('big.jpg'))
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(response, 'form', 'image',
+                             'Файл больше 100\xa0байт.')
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=10)
+    def test_handler_stops_passing_data(self):
+        """После лимита обработчик не передаёт данные дальше."""
+        handler = SizeLimitUploadHandler()
+        handler.new_file('image', 'big.jpg', 'image/jpeg', None)
+        self.assertEqual(handler.receive_data_chunk(b'x' * 8, 0), b'x' * 8)
+        self.assertIsNone(handler.receive_data_chunk(b'x' * 8, 8))
+        upload = handler.file_complete(16)
+        self.assertEqual((upload.name, upload.size), ('big.jpg', 16))
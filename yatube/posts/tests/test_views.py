@@ -86,6 +86,28 @@ class ViewTests(TestCase):
         response = self.client.get(reverse('posts:index') + '?page=3')
         self.assertEqual(len(response.context['page_obj']), LAST_PAGE)
 
+    def test_views_index_cursor_paginator(self):
+        """Проверка курсорной пагинации в index view."""
+        response = self.client.get(reverse('posts:index') + '?cursor=')
+        page = response.context['page_obj']
+        self.assertTrue(page.cursor_mode)
+        self.assertFalse(page.has_previous())
+        pages = [[post.pk for post in page]]
+        while page.next_cursor:
+            response = self.client.get(
+                reverse('posts:index') + '?cursor=' + page.next_cursor)
+            page = response.context['page_obj']
+            pages.append([post.pk for post in page])
+        self.assertEqual([len(ids) for ids in pages],
+                         [PAGINATE_BY, PAGINATE_BY, LAST_PAGE])
+        self.assertEqual(sum(pages, []), list(Post.objects.order_by(
+            '-pub_date', '-id').values_list('pk', flat=True)))
+        response = self.client.get(
+            reverse('posts:index') + '?cursor=' + page.previous_cursor)
+        page = response.context['page_obj']
+        self.assertEqual([post.pk for post in page], pages[1])
+        self.assertTrue(page.has_next())
+
     def test_views_index_context(self):
         """Проверка context в index view."""
         response = self.authorized_client.get(reverse('posts:index'))
@@ -230,10 +252,8 @@ class ViewTests(TestCase):
         response = self.client.get(reverse(
             'posts:index'
         ))
-        Post.objects.create(
-            author=ViewTests.user,
-            text='Пост для проверки кеша',
-            group=ViewTests.group
+        Post.objects.filter(pk=Post.objects.latest('pub_date').pk).update(
+            text='Изменено в обход сигналов'
         )
         self.assertEqual(
             response.content,
@@ -249,6 +269,32 @@ class ViewTests(TestCase):
             )).content
         )
 
+    def test_cache_invalidation(self):
+        """Новый пост и изменение группы сразу сбрасывают кеш лент."""
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:group_list',
+                    kwargs={'slug': ViewTests.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': ViewTests.user}),
+        )
+        for address in addresses:
+            self.client.get(address)
+        post = Post.objects.create(
+            author=ViewTests.user,
+            text='Пост для проверки кеша',
+            group=ViewTests.group
+        )
+        for address in addresses:
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertEqual(response.context['page_obj'][0], post)
+        group = Group.objects.get(pk=ViewTests.group.pk)
+        group.title = 'Новое название группы'
+        group.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новое название группы')
+
     def test_user_follow(self):
         """Проверка авторизованного пользователя
         на возможность подписаться."""
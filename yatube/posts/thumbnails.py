@@ -0,0 +1,161 @@
+"""Предварительная генерация уменьшенных копий картинок постов.
+
+Для каждой картинки создаётся набор копий (renditions) нескольких ширин
+в WebP и JPEG. Копии делает фоновый поток после сохранения поста (или
+команда generate_thumbnails), а шаблоны только ищут готовые и никогда не
+открывают саму картинку во время запроса.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from PIL import features
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+logger = logging.getLogger(__name__)
+
+# Пропорции карточки ленты 960x550, обрезка по центру.
+WIDTHS = (320, 640, 960)
+ASPECT = 550 / 960
+CROP_OPTIONS = {'crop': 'center', 'upscale': True}
+# JPEG идёт последним: это запасной формат для <img>.
+FORMATS = ('WEBP', 'JPEG') if features.check('webp') else ('JPEG',)
+# Как долго помнить, что копий картинки ещё нет.
+MISSING_TIMEOUT = 60
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def renditions():
+    """(формат, ширина, геометрия, опции) всех копий картинки."""
+    for image_format in FORMATS:
+        for width in WIDTHS:
+            geometry = f'{width}x{round(width * ASPECT)}'
+            options = dict(CROP_OPTIONS, format=image_format)
+            yield image_format, width, geometry, options
+
+
+def manifest_key(name):
+    return f'renditions:{name}'
+
+
+def rendition_files(source):
+    """(формат, ширина, геометрия, опции, файл) копий картинки source."""
+    for image_format, width, geometry, options in renditions():
+        options = thumbnail_options(source, options)
+        name = default.backend._get_thumbnail_filename(
+            source, geometry, options)
+        yield (image_format, width, geometry, options,
+               ImageFile(name, default.storage))
+
+
+def generate(name):
+    """Создаёт копии картинки name, возвращает успех.
+
+    Копии шире исходника не делаются: их растянет и браузер, а у мелких
+    картинок копий нет совсем. Исходник декодируется один раз на все
+    копии. База данных не используется: имена копий детерминированы,
+    а их список кладётся в кеш.
+    """
+    source = ImageFile(name)
+    try:
+        source_image = default.engine.get_image(source)
+    except Exception:
+        logger.exception('Не удалось открыть картинку %s', name)
+        return False
+    try:
+        source_width, _ = default.engine.get_image_size(source_image)
+        image_info = default.engine.get_image_info(source_image)
+        manifest = {}
+        for image_format, width, geometry, options, thumbnail in (
+            rendition_files(source)
+        ):
+            if width > source_width:
+                continue
+            if not thumbnail.exists():
+                options['image_info'] = image_info
+                default.backend._create_thumbnail(
+                    source_image, geometry, options, thumbnail)
+            manifest.setdefault(image_format, []).append(
+                (width, thumbnail.url))
+    finally:
+        default.engine.cleanup(source_image)
+    cache.set(manifest_key(name), manifest, None)
+    return True
+
+
+def generate_in_worker(name):
+    try:
+        return generate(name)
+    finally:
+        connections.close_all()
+
+
+def schedule(name):
+    if name:
+        get_executor().submit(generate_in_worker, name)
+
+
+def thumbnail_options(source, options):
+    """Опции в том виде, в каком их дополняет ThumbnailBackend."""
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', default.backend._get_format(source))
+    for key, value in ThumbnailBackend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in ThumbnailBackend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def scan(image):
+    """Список копий по файлам: на случай, если кеш его потерял."""
+    manifest = {}
+    for image_format, width, _, _, thumbnail in rendition_files(
+        ImageFile(image)
+    ):
+        if thumbnail.exists():
+            manifest.setdefault(image_format, []).append(
+                (width, thumbnail.url))
+    cache.set(manifest_key(image.name), manifest,
+              None if manifest else MISSING_TIMEOUT)
+    return manifest
+
+
+def lookup_many(images):
+    """Готовые копии картинок одним обращением к кешу: {имя: копии}."""
+    images = {manifest_key(image.name): image for image in images if image}
+    found = cache.get_many(images)
+    return {
+        image.name: found[key] if key in found else scan(image)
+        for key, image in images.items()
+    }
+
+
+def lookup(image):
+    """Готовые копии картинки: {формат: [(ширина, url), ...]}.
+
+    Картинка не читается. Пока копий нет, возвращается пустой словарь,
+    и шаблон показывает исходную картинку.
+    """
+    if not image:
+        return {}
+    return lookup_many([image])[image.name]
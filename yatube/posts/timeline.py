@@ -0,0 +1,153 @@
+"""Лента подписок с раскладкой постов при записи (fan-out-on-write).
+
+Новый пост сразу раскладывается в Timeline всех подписчиков автора, так что
+чтение ленты — один проход по индексу (user, pub_date). Для авторов с
+числом подписчиков больше TIMELINE_FANOUT_LIMIT раскладка не делается:
+их посты подмешиваются в ленту при чтении (fan-out-on-read).
+"""
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import F, Q
+
+from .models import Follow, Post, Profile, Timeline
+
+
+def celebrity_ids(author_ids):
+    """id авторов из author_ids, чьи посты не раскладываются по лентам."""
+    return set(Profile.objects.filter(
+        user_id__in=author_ids,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('user_id', flat=True))
+
+
+def insert(entries):
+    """Сохраняет записи лент пачками по TIMELINE_BATCH_SIZE.
+
+    bulk_create сам собирает все объекты в список, поэтому генератор
+    режется на пачки здесь: память не зависит от числа записей.
+    """
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, settings.TIMELINE_BATCH_SIZE))
+        if not batch:
+            return
+        Timeline.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Добавляет новый пост в ленты подписчиков автора."""
+    fan_out_many([post])
+
+
+def fan_out_many(posts):
+    """Раскладывает пачку постов: по запросу на всех авторов пачки."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    for author_id in celebrity_ids(by_author):
+        del by_author[author_id]
+    if not by_author:
+        return
+    followers = Follow.objects.filter(
+        author_id__in=by_author).values_list('author_id', 'user_id')
+    insert(
+        Timeline(
+            user_id=user_id,
+            author_id=author_id,
+            post_id=post.pk,
+            pub_date=post.pub_date,
+        )
+        for author_id, user_id in followers.iterator()
+        for post in by_author[author_id]
+    )
+
+
+def backfill(follow):
+    """Заполняет ленту последними постами автора после подписки."""
+    backfill_many([follow])
+
+
+def backfill_many(follows):
+    """Заполняет ленты по пачке подписок: посты читаются раз на автора."""
+    by_author = defaultdict(list)
+    for follow in follows:
+        by_author[follow.author_id].append(follow.user_id)
+    for author_id in celebrity_ids(by_author):
+        del by_author[author_id]
+    for author_id, user_ids in by_author.items():
+        posts = list(Post.objects.filter(author_id=author_id).values_list(
+            'id', 'pub_date')[:settings.TIMELINE_BACKFILL_SIZE])
+        insert(
+            Timeline(
+                user_id=user_id,
+                author_id=author_id,
+                post_id=post_id,
+                pub_date=pub_date,
+            )
+            for user_id in user_ids
+            for post_id, pub_date in posts
+        )
+
+
+def backfill_all(follows):
+    """backfill_many по пачкам подписок из итератора любой длины."""
+    follows = iter(follows)
+    while True:
+        batch = list(islice(follows, settings.TIMELINE_BATCH_SIZE))
+        if not batch:
+            return
+        backfill_many(batch)
+
+
+def remove(follow):
+    """Убирает посты автора из ленты отписавшегося пользователя."""
+    Timeline.objects.filter(
+        user_id=follow.user_id, author_id=follow.author_id).delete()
+
+
+def demote(author_id):
+    """Раскладывает посты автора, только что ставшего непопулярным.
+
+    Пока подписчиков было больше TIMELINE_FANOUT_LIMIT, его посты в ленты
+    не попадали, а теперь ленты читаются без него. Подписки обходятся
+    пачками: посты автора читаются раз на пачку, а не на подписчика.
+    """
+    if Profile.objects.filter(
+        user_id=author_id,
+        followers_count=settings.TIMELINE_FANOUT_LIMIT,
+    ).exists():
+        backfill_all(Follow.objects.filter(author_id=author_id).only(
+            'user_id', 'author_id').iterator())
+
+
+def rebuild():
+    """Заполняет все ленты заново; отдаёт число записей."""
+    Timeline.objects.all().delete()
+    # По автору подряд: в пачке мало разных авторов и запросов постов.
+    backfill_all(Follow.objects.order_by('author_id').only(
+        'user_id', 'author_id').iterator())
+    return Timeline.objects.count()
+
+
+def celebrity_authors(user):
+    """id авторов из подписок user, чьи посты читаются без раскладки."""
+    return list(Follow.objects.filter(
+        user=user,
+        author__profile__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('author', flat=True))
+
+
+def feed(user):
+    """Посты ленты подписок user."""
+    celebrities = celebrity_authors(user)
+    if not celebrities:
+        return Post.objects.filter(timeline_entries__user=user).order_by(
+            F('timeline_entries__pub_date').desc(),
+            F('timeline_entries__post').desc(),
+        )
+    return Post.objects.filter(
+        Q(id__in=Timeline.objects.filter(user=user).values('post'))
+        | Q(author__in=celebrities)
+    )
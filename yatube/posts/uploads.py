@@ -0,0 +1,136 @@
+"""Приём картинок постов с ограничением по размеру и памяти.
+
+SizeLimitUploadHandler перестаёт принимать файл, как только тот превысит
+IMAGE_UPLOAD_MAX_SIZE, и отдаёт вместо него OversizedUpload. sanitize()
+проверяет формат и число пикселей по заголовку, не декодируя картинку, и
+пересохраняет её без метаданных во временный файл, который сбрасывается
+на диск, а оттуда по частям копируется в хранилище.
+"""
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+# Тег EXIF с поворотом снимка: применяется до того, как EXIF отброшен.
+ORIENTATION = 0x0112
+
+
+class OversizedUpload(UploadedFile):
+    """Файл, приём которого прервали из-за размера."""
+
+    def __init__(self, name, content_type, size):
+        super().__init__(BytesIO(), name, content_type, size)
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    """Обрывает приём файла больше IMAGE_UPLOAD_MAX_SIZE.
+
+    Стоит первым в FILE_UPLOAD_HANDLERS: после превышения лимита данные
+    не передаются следующим обработчикам и не копятся ни в памяти, ни
+    на диске.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.oversized = bool(
+            self.content_length
+            and self.content_length > settings.IMAGE_UPLOAD_MAX_SIZE
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self.oversized = True
+        if self.oversized:
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not self.oversized:
+            return None
+        return OversizedUpload(self.file_name, self.content_type,
+                               self.received)
+
+
+def size_error():
+    return ValidationError(
+        'Файл больше %(limit)s.',
+        code='file_too_large',
+        params={'limit': filesizeformat(settings.IMAGE_UPLOAD_MAX_SIZE)},
+    )
+
+
+def open_checked(upload):
+    """Открывает картинку по заголовку и проверяет формат и размеры."""
+    if upload.size > settings.IMAGE_UPLOAD_MAX_SIZE:
+        raise size_error()
+    upload.seek(0)
+    try:
+        image = Image.open(upload)
+    except (Image.DecompressionBombError, OSError, SyntaxError):
+        raise ValidationError('Не удалось прочитать картинку.',
+                              code='invalid_image')
+    if image.format not in settings.IMAGE_FORMATS:
+        raise ValidationError(
+            'Формат %(format)s не поддерживается.',
+            code='invalid_format', params={'format': image.format},
+        )
+    width, height = image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка %(width)sx%(height)s слишком велика.',
+            code='too_many_pixels',
+            params={'width': width, 'height': height},
+        )
+    return image
+
+
+def reencode(image):
+    """Пересохраняет картинку в её же формате без EXIF и прочих данных.
+
+    Сторона уменьшается до IMAGE_MAX_SIDE, JPEG при этом сразу декодируется
+    в уменьшенном масштабе. У анимаций остаётся первый кадр.
+    """
+    image_format = image.format
+    limit = (settings.IMAGE_MAX_SIDE, settings.IMAGE_MAX_SIDE)
+    if image_format == 'JPEG':
+        image.draft(image.mode, limit)
+    image.thumbnail(limit)
+    if image.getexif().get(ORIENTATION, 1) != 1:
+        image = ImageOps.exif_transpose(image)
+    # Кодеры Pillow пишут EXIF (PNG, WebP) и комментарии (GIF) из
+    # image.info: остаются только цветовой профиль и прозрачность.
+    options = {'exif': b''}
+    for key in ('icc_profile', 'transparency'):
+        if key in image.info:
+            options[key] = image.info[key]
+    image.info = {}
+    if image_format == 'JPEG':
+        if image.mode not in ('RGB', 'L', 'CMYK'):
+            image = image.convert('RGB')
+        options.update(quality=90, optimize=True)
+    output = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    image.save(output, image_format, **options)
+    return output, image_format
+
+
+def sanitize(upload):
+    """Проверенная и очищенная копия загруженной картинки."""
+    image = open_checked(upload)
+    try:
+        output, image_format = reencode(image)
+    except (Image.DecompressionBombError, OSError, SyntaxError):
+        raise ValidationError('Не удалось прочитать картинку.',
+                              code='invalid_image')
+    finally:
+        image.close()
+    size = output.tell()
+    output.seek(0)
+    return UploadedFile(output, upload.name, Image.MIME[image_format], size)
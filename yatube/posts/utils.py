@@ -1,11 +1,255 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
 
 
 PAGINATE_BY = 10
+# Номера страниц (?page=N) используются только для первых страниц ленты,
+# дальше навигация идёт по курсору (?cursor=...).
+PAGE_NUMBER_LIMIT = 10
+KEYSET_ORDERING = ('-pub_date', '-id')
+# Сколько секунд хранится COUNT(*) для CountedPaginator с cache_key.
+COUNT_CACHE_TIMEOUT = 60
+COMMENT_ORDERING = ('pub_date', 'id')
+
+
+def estimate_rows(model):
+    """Число строк таблицы по статистике базы или None, если её нет.
+
+    Статистику собирает ANALYZE; значение приблизительное, зато не
+    требует прохода по таблице.
+    """
+    table = model._meta.db_table
+    queries = {
+        'postgresql': 'SELECT reltuples FROM pg_class WHERE relname = %s',
+        'sqlite': 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+    }
+    if connection.vendor not in queries:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(queries[connection.vendor], [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    # В sqlite_stat1 первое число строки stat — число строк таблицы.
+    return int(float(str(row[0]).split()[0]))
+
+
+def bounded_count(queryset, limit):
+    """(число строк, approximate, lower_bound) без подсчёта дальше limit.
+
+    Строки считаются только до limit + 1. Если их больше, для выборки без
+    фильтров берётся оценка по статистике базы, а для отфильтрованной
+    (или без статистики) — limit как нижняя граница.
+    """
+    queryset = queryset.order_by()
+    count = queryset[:limit + 1].count()
+    if count <= limit:
+        return count, False, False
+    estimate = None if queryset.query.where else estimate_rows(
+        queryset.model)
+    if estimate is not None and estimate > limit:
+        return estimate, True, False
+    return limit, True, True
+
+
+def encode_cursor(post, direction):
+    """Кодирует позицию поста в ленте в непрозрачный курсор."""
+    raw = f'{direction}|{post.pub_date.isoformat()}|{post.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Возвращает (направление, дата, id) или None для битого курсора."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        direction, pub_date, pk = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if direction not in ('n', 'p') or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+class CursorPage(Page):
+    """Страница ленты, полученная по курсору, без подсчёта всех записей."""
+    cursor_mode = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not (self._has_next and self.object_list):
+            return None
+        return encode_cursor(self.object_list[-1], 'n')
+
+    @property
+    def previous_cursor(self):
+        if not (self._has_previous and self.object_list):
+            return None
+        return encode_cursor(self.object_list[0], 'p')
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинация по (pub_date, id).
+
+    Каждая страница — один запрос с LIMIT по индексу, без COUNT(*)
+    и без OFFSET. Ожидает queryset, упорядоченный по KEYSET_ORDERING
+    или по равным им полям (например, по дате и id поста в Timeline),
+    а при ascending=True — по возрастанию тех же полей.
+    """
+
+    def __init__(self, object_list, per_page, ascending=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.ascending = ascending
+
+    def cursor_page(self, cursor):
+        position = decode_cursor(cursor) if cursor else None
+        if position is None:
+            return self._slice(self.object_list, None, has_previous=False)
+        direction, pub_date, pk = position
+        forward, backward = ('gt', 'lt') if self.ascending else ('lt', 'gt')
+        if direction == 'n':
+            queryset = self.object_list.filter(self.after(
+                forward, pub_date, pk))
+            return self._slice(queryset, direction, has_previous=True)
+        queryset = self.object_list.filter(self.after(
+            backward, pub_date, pk)).reverse()
+        return self._slice(queryset, direction, has_previous=True)
+
+    @staticmethod
+    def after(lookup, pub_date, pk):
+        """Строки за позицией (pub_date, pk) в направлении lookup."""
+        return (Q(**{f'pub_date__{lookup}': pub_date})
+                | Q(pub_date=pub_date, **{f'id__{lookup}': pk}))
+
+    def _slice(self, queryset, direction, has_previous):
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'p':
+            rows.reverse()
+            return CursorPage(rows, self, True, has_more)
+        return CursorPage(rows, self, has_more, has_previous)
+
+
+class CountedPaginator(Paginator):
+    """Paginator без COUNT(*) по всей выборке на каждой странице.
+
+    count — готовое число строк из счётчиков (Group.posts_count,
+    Profile.posts_count). cache_key — COUNT(*) считается один раз и
+    хранится в кеше COUNT_CACHE_TIMEOUT секунд. many_pages — строки
+    считаются только до последней пронумерованной страницы
+    (PAGE_NUMBER_LIMIT); если их больше, approximate становится True.
+    Для выборки без фильтров число оценивается по статистике базы, для
+    отфильтрованной известна только нижняя граница (lower_bound): страниц
+    больше PAGE_NUMBER_LIMIT. При approximate номера страниц дальше
+    PAGE_NUMBER_LIMIT не выдаются: get_page отдаёт вместо них первую
+    страницу курсора после пронумерованных.
+    """
+
+    def __init__(self, object_list, per_page, count=None, cache_key=None,
+                 many_pages=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.known_count = count
+        self.cache_key = cache_key
+        self.many_pages = many_pages
+        self.approximate = False
+        self.lower_bound = False
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+        if self.many_pages:
+            count, self.approximate, self.lower_bound = bounded_count(
+                self.object_list, self.per_page * PAGE_NUMBER_LIMIT)
+            return count
+        if self.cache_key is None:
+            return super().count
+        key = f'paginator-count:{self.cache_key}'
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+    @property
+    def numbered_pages(self):
+        """Страниц с номерами; при lower_bound всего страниц больше."""
+        return PAGE_NUMBER_LIMIT
+
+    def beyond_numbers(self, number):
+        """Номер за пронумерованными страницами оценочной выборки."""
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return False
+        # count вычисляется первым: он выставляет approximate.
+        return (number > PAGE_NUMBER_LIMIT and self.count > 0
+                and self.approximate)
+
+    def get_page(self, number):
+        if self.beyond_numbers(number):
+            return self.cursor_page()
+        return super().get_page(number)
+
+    def cursor_page(self):
+        """Первая страница курсора после пронумерованных страниц."""
+        position = PAGE_NUMBER_LIMIT * self.per_page - 1
+        try:
+            last = self.object_list[position]
+        except IndexError:
+            return super().get_page(PAGE_NUMBER_LIMIT)
+        return CursorPaginator(self.object_list, self.per_page).cursor_page(
+            encode_cursor(last, 'n'))
+
 
+def paginate(request, post_list, count=None, cache_key=None,
+             many_pages=False):
+    """Страница ленты по ?cursor= или ?page=.
 
-def paginate(request, post_list):
-    paginator = Paginator(post_list, PAGINATE_BY)
+    count, cache_key и many_pages передаются в CountedPaginator.
+    """
+    if not post_list.query.order_by:
+        post_list = post_list.order_by(*KEYSET_ORDERING)
+    cursor = request.GET.get('cursor')
+    if cursor is not None:
+        return CursorPaginator(post_list, PAGINATE_BY).cursor_page(cursor)
+    paginator = CountedPaginator(post_list, PAGINATE_BY, count=count,
+                                 cache_key=cache_key, many_pages=many_pages)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    if isinstance(page_obj, CursorPage):
+        return page_obj
+    page_obj.cursor_mode = False
+    page_obj.next_cursor = None
+    # При lower_bound пронумерованные страницы кончаются раньше строк:
+    # с последней из них лента продолжается курсором.
+    has_more = page_obj.has_next() or paginator.lower_bound
+    if has_more and page_obj.number >= PAGE_NUMBER_LIMIT:
+        page_obj.next_cursor = encode_cursor(page_obj[-1], 'n')
     return page_obj
@@ -1,21 +1,34 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
 from django.shortcuts import render
-from django.views.decorators.cache import cache_page
+
+from core.concurrency import run_concurrently
+from core.db import use_primary, use_replica
 
 from .models import Follow, User
-from .models import Group, Post
+from .models import Comment, Group, Post
 from .forms import PostForm, CommentForm
-from posts.utils import paginate
+from posts import counters, feed_cache, timeline
+from posts.conditional import (conditional, group_feeds, index_feeds,
+                               post_feeds, profile_feeds)
+from posts.search import SearchResults
+from posts.utils import COMMENT_ORDERING, CursorPaginator, paginate
 
 PAGINATE_BY = 10
+COMMENTS_PER_PAGE = 50
 
 
-@cache_page(20, cache='default', key_prefix='index_page')
+@use_replica()
+@conditional(index_feeds)
 def index(request):
-    post_list = Post.objects.select_related('author', 'group')
-    page_obj = paginate(request, post_list)
+    post_list = Post.objects.for_feed()
+    page_obj = feed_cache.page(request, post_list, 'index', many_pages=True)
     context = {
         'index': True,
         'page_obj': page_obj,
@@ -23,10 +36,13 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@use_replica()
+@conditional(group_feeds)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    page_obj = paginate(request, post_list)
+    post_list = group.posts.for_feed()
+    page_obj = feed_cache.page(request, post_list, f'group:{group.pk}',
+                               count=group.posts_count)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -34,18 +50,21 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@use_replica()
+@conditional(profile_feeds)
 def profile(request, username):
     user = request.user
-    author = get_object_or_404(User, username=username)
-    following = (
-        user.is_authenticated
-        and user != author
-        and Follow.objects.filter(
-            author=author).filter(user=user).exists()
+    author = get_object_or_404(
+        User.objects.select_related('profile'), username=username)
+    check_follow = user.is_authenticated and user != author
+    post_list = author.posts.for_feed()
+    count = counters.get_profile(author).posts_count
+    following, page_obj = run_concurrently(
+        lambda: check_follow and Follow.objects.filter(
+            author=author).filter(user=user).exists(),
+        lambda: feed_cache.page(request, post_list, f'author:{author.pk}',
+                                count=count),
     )
-    post_list = author.posts.all()
-    count = author.posts.all().count()
-    page_obj = paginate(request, post_list)
     context = {
         'author': author,
         'following': following,
@@ -55,19 +74,63 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()[:settings.SEARCH_MAX_LENGTH]
+    paginator = Paginator(SearchResults(query), PAGINATE_BY)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@use_replica()
+@conditional(post_feeds)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post, comments = run_concurrently(
+        lambda: get_object_or_404(
+            Post.objects.select_related('author__profile', 'group'),
+            id=post_id),
+        lambda: comment_page(request, post_id),
+    )
+    # Шаблон выводит post.author.profile.posts_count: у авторов из
+    # bulk_create профиля может не быть.
+    counters.get_profile(post.author)
     form = CommentForm(request.POST or None)
-    comment_list = post.comments.all()
     context = {
         'post': post,
-        'comments': comment_list,
+        'comments': comments,
         'form': form,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@use_replica()
+@conditional(post_feeds)
+def post_comments(request, post_id):
+    """Следующая страница комментариев для подгрузки на странице поста."""
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    context = {
+        'post': post,
+        'comments': comment_page(request, post_id),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def comment_page(request, post_id):
+    """Комментарии от старых к новым, страница по курсору ?cursor=."""
+    comment_list = Comment.objects.filter(
+        post_id=post_id).with_author().order_by(*COMMENT_ORDERING)
+    paginator = CursorPaginator(
+        comment_list, COMMENTS_PER_PAGE, ascending=True)
+    return paginator.cursor_page(request.GET.get('cursor'))
+
+
 @login_required(login_url='/auth/login/')
+@use_primary()
+@transaction.atomic
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -82,6 +145,8 @@ def post_create(request):
 
 
 @login_required(login_url='/auth/login/')
+@use_primary()
+@transaction.atomic
 def post_delete(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     if request.user == post.author:
@@ -90,6 +155,8 @@ def post_delete(request, post_id):
 
 
 @login_required(login_url='/auth/login/')
+@use_primary()
+@transaction.atomic
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = PostForm(
@@ -110,6 +177,8 @@ def post_edit(request, post_id):
 
 
 @login_required
+@use_primary()
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -122,11 +191,11 @@ def add_comment(request, post_id):
 
 
 @login_required
+@use_replica()
 def follow_index(request):
-    post_list = Post.objects.filter(
-        author__following__user=request.user
-    )
-    page_obj = paginate(request, post_list)
+    post_list = timeline.feed(request.user).for_feed()
+    # Точное число постов ленты подписок на странице не выводится.
+    page_obj = paginate(request, post_list, many_pages=True)
     context = {
         'follow': True,
         'page_obj': page_obj,
@@ -135,6 +204,8 @@ def follow_index(request):
 
 
 @login_required
+@use_primary()
+@transaction.atomic
 def profile_follow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
@@ -148,6 +219,8 @@ def profile_follow(request, username):
 
 
 @login_required
+@use_primary()
+@transaction.atomic
 def profile_unfollow(request, username):
     user = request.user
     get_object_or_404(
@@ -0,0 +1,10 @@
+"""Настройки выбираются переменной DJANGO_ENV: dev (по умолчанию) или prod.
+
+Общее лежит в base, dev и prod переопределяют только отличия.
+"""
+import os
+
+if os.environ.get('DJANGO_ENV', 'dev') == 'prod':
+    from .prod import *  # noqa: F401,F403
+else:
+    from .dev import *  # noqa: F401,F403
@@ -0,0 +1,229 @@
+import os
+
+from core.db import databases_from_env
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY', '^)7bk$-7n7oepk$4q-pd7we259)3$#)$@y)a(5o8@&(le@013)')
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver', ]
+
+INSTALLED_APPS = [
+    'users.apps.UsersConfig',
+    'posts.apps.PostsConfig',
+    'core.apps.CoreConfig',
+    'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.PrimaryPinMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [os.path.join(BASE_DIR, 'templates')],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+# Компилировать все шаблоны при запуске, чтобы первые запросы не ждали
+# загрузчик. Имеет смысл только с кеширующим загрузчиком (см. prod).
+TEMPLATE_WARMUP = False
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+# ASGI-сервер (uvicorn yatube.asgi:application) выполняет запросы к Django
+# в пуле из ASGI_THREADS потоков.
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 32))
+# Потоки для независимых запросов внутри view (core.concurrency);
+# 0 — выполнять их по очереди.
+VIEW_QUERY_WORKERS = int(os.environ.get('VIEW_QUERY_WORKERS', 8))
+
+
+# Базы задаются переменными DATABASE_URL, DATABASE_REPLICA_URLS,
+# DATABASE_CONN_MAX_AGE и DATABASE_POOLER (см. core/db.py). По умолчанию —
+# SQLite в BASE_DIR без реплик.
+DATABASES = databases_from_env(os.environ, BASE_DIR)
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+# После записи браузер столько секунд читает из основной базы, а страницы
+# лент, прочитанные с реплики, кешируются не дольше этого срока. Должно
+# быть больше отставания реплик.
+REPLICA_PIN_SECONDS = int(os.environ.get('DATABASE_REPLICA_PIN', 10))
+
+# Прагмы каждого соединения SQLite: журнал WAL не блокирует чтение во
+# время записи, synchronous=NORMAL в WAL безопасен при сбое процесса,
+# mmap и кеш страниц (в КиБ при отрицательном значении) ускоряют чтение.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)),
+}
+
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+# Без CACHE_URL кеш локальный для процесса. С CACHE_URL=redis://host:port/db
+# кеш общий для всех процессов, а перед ним стоит near-кеш: LRU процесса
+# не больше CACHE_NEAR_ENTRIES записей и CACHE_NEAR_BYTES байт, запись в
+# котором живёт CACHE_NEAR_TIMEOUT секунд. CACHE_NEAR_ENTRIES=0 отключает
+# near-кеш. Версии лент и время их изменения читаются только из общего
+# кеша: ими инвалидируется всё остальное.
+CACHE_URL = os.environ.get('CACHE_URL')
+CACHE_NEAR_ENTRIES = int(os.environ.get('CACHE_NEAR_ENTRIES', 1000))
+
+if CACHE_URL:
+    CACHES = {
+        'shared': {
+            'BACKEND': 'core.cache.backends.RedisCache',
+            'LOCATION': CACHE_URL,
+            # Без сервера кеша сайт работает, только медленнее.
+            'OPTIONS': {'SOCKET_TIMEOUT': 1, 'FAIL_OPEN': True},
+        },
+        'default': {
+            'BACKEND': 'core.cache.backends.NearCache',
+            'OPTIONS': {
+                'SHARED': 'shared',
+                'MAX_ENTRIES': CACHE_NEAR_ENTRIES,
+                'MAX_BYTES': int(os.environ.get(
+                    'CACHE_NEAR_BYTES', 16 * 1024 * 1024)),
+                'LOCAL_TIMEOUT': int(os.environ.get('CACHE_NEAR_TIMEOUT', 5)),
+                'BYPASS_PREFIXES': ['feed-version:', 'feed-modified:'],
+            },
+        },
+    }
+    if not CACHE_NEAR_ENTRIES:
+        CACHES['default'] = CACHES['shared']
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Страницы лент инвалидируются сигналами, поэтому могут жить долго.
+FEED_CACHE_TIMEOUT = 60 * 60
+# Карточки постов в кеше: ключ меняется при изменении поста, автора или
+# группы, так что срок нужен только для вытеснения старых версий.
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+STATIC_URL = '/static/'
+
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+SIGNUP_URL = 'users:signup'
+SIGNUP_REDIRECT_URL = 'posts:index'
+
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Загрузка картинок: файл больше IMAGE_UPLOAD_MAX_SIZE обрывается ещё при
+# приёме, картинка больше IMAGE_MAX_PIXELS отклоняется по заголовку, а
+# принятая пересохраняется без метаданных со стороной не больше
+# IMAGE_MAX_SIDE.
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.SizeLimitUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 25_000_000
+IMAGE_MAX_SIDE = 2560
+IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
+# Фоновые потоки, создающие миниатюры картинок после сохранения поста.
+THUMBNAIL_WORKERS = 2
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Лента подписок: авторы с большим числом подписчиков не раскладываются
+# по лентам при публикации, их посты подмешиваются при чтении.
+TIMELINE_FANOUT_LIMIT = 10000
+TIMELINE_BACKFILL_SIZE = 500
+TIMELINE_BATCH_SIZE = 1000
+
+# Полнотекстовый поиск по постам. По умолчанию хранилище выбирается по
+# базе: на SQLite индекс в таблице FTS5 (posts.search.SqliteFtsBackend),
+# на остальных — поиск по posts_post (posts.search.DatabaseBackend).
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND')
+SEARCH_MAX_LENGTH = 200
+
+# JSON API: размер страницы по умолчанию и наибольший для ?limit=.
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+# Профилирование запросов к posts, users и about: число и время запросов
+# к базе, отрисовка шаблонов, кеш. Медленные запросы пишутся в лог
+# 'yatube.profiling', сводка для Prometheus отдаётся по /metrics персоналу
+# и по заголовку "Authorization: Bearer <PROFILING_METRICS_TOKEN>".
+PROFILING_ENABLED = os.environ.get('PROFILING', '') == '1'
+PROFILING_NAMESPACES = ('posts', 'users', 'about')
+PROFILING_SLOW_REQUEST_MS = int(os.environ.get('PROFILING_SLOW_MS', 500))
+PROFILING_MAX_SERIES = 100
+PROFILING_METRICS_TOKEN = os.environ.get('PROFILING_METRICS_TOKEN', '')
@@ -4,4 +4,7 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
+from core.templates import warm_up_on_startup  # noqa: E402
+
 application = get_wsgi_application()
+warm_up_on_startup()